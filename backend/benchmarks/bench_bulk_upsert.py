@@ -0,0 +1,96 @@
+"""Benchmark: backfill de métricas diarias en SQLite (bucle fila a fila vs bulk upsert).
+
+Crea una base SQLite temporal con ``--channels`` canales y ``--days`` días por
+canal. El bucle anterior (SELECT + ORM por fila) se mide sobre ``--legacy-channels``
+canales y se extrapola; el bulk upsert se mide sobre el total.
+
+Uso (desde ``backend/``):
+    python -m benchmarks.bench_bulk_upsert --channels 100 --days 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.core.database import Base
+from src.db.models import Channel, DailyMetric
+from src.services.metrics_service import upsert_daily_metrics
+
+def _daily_frame(days):
+    start = date.today() - timedelta(days=days)
+    return pd.DataFrame({
+        "day": pd.date_range(start, periods=days, freq="D"),
+        "views": range(days),
+        "likes": range(days),
+        "comments": range(days),
+        "subscribers": range(days),
+    })
+
+def _legacy_upsert(db, channel_pk, df):
+    for _, row in df.iterrows():
+        row_date = row["day"].date()
+        metric = db.query(DailyMetric).filter(
+            DailyMetric.channel_id_fk == channel_pk,
+            DailyMetric.date == row_date
+        ).first()
+        if not metric:
+            metric = DailyMetric(channel_id_fk=channel_pk, date=row_date)
+            db.add(metric)
+        metric.views = row["views"]
+        metric.likes = row["likes"]
+        metric.comments = row["comments"]
+        metric.subscribers = row["subscribers"]
+    db.commit()
+
+def _session(path, channels):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(Channel(channel_id=f"UC{i:022d}", title=f"Canal {i}") for i in range(channels))
+    db.commit()
+    return db, [pk for (pk,) in db.query(Channel.id).order_by(Channel.id)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=100)
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--legacy-channels", type=int, default=3)
+    args = parser.parse_args()
+
+    df = _daily_frame(args.days)
+    total_rows = args.channels * args.days
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, pks = _session(os.path.join(tmp, "legacy.db"), args.legacy_channels)
+        start = time.perf_counter()
+        for pk in pks:
+            _legacy_upsert(db, pk, df)
+        legacy = (time.perf_counter() - start) / len(pks) * args.channels
+        db.close()
+
+        db, pks = _session(os.path.join(tmp, "bulk.db"), args.channels)
+        start = time.perf_counter()
+        for pk in pks:
+            upsert_daily_metrics(db, df, channel_pk=pk)
+        db.commit()
+        bulk_insert = time.perf_counter() - start
+
+        # Segunda pasada: todas las filas entran por la rama ON CONFLICT DO UPDATE
+        start = time.perf_counter()
+        for pk in pks:
+            upsert_daily_metrics(db, df, channel_pk=pk)
+        db.commit()
+        bulk_update = time.perf_counter() - start
+        stored = db.query(DailyMetric).count()
+        db.close()
+
+    print(f"filas: {total_rows:,} ({args.channels} canales x {args.days} días), guardadas: {stored:,}")
+    print(f"bucle fila a fila (extrapolado) : {legacy:8.2f} s  ({total_rows / legacy:10,.0f} filas/s)")
+    print(f"bulk upsert (insert)            : {bulk_insert:8.2f} s  ({total_rows / bulk_insert:10,.0f} filas/s)")
+    print(f"bulk upsert (update)            : {bulk_update:8.2f} s  ({total_rows / bulk_update:10,.0f} filas/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: tiempo de carga y RSS de la caché de videos según el formato.
+
+Genera un canal sintético de ``--videos`` videos, lo guarda en CSV, Parquet y
+Arrow IPC, y mide cada lectura en un proceso nuevo (para que el RSS no se
+contamine entre formatos).
+
+Uso (desde ``backend/``):
+    python -m benchmarks.bench_cache_format --videos 20000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+def synthetic_videos(count, seed=0):
+    """Catálogo sintético con el mismo esquema que fetch_all_videos."""
+    rng = np.random.default_rng(seed)
+    published = pd.Timestamp("2015-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 3600 * 24 * 3650, count), unit="s")
+    ids = [f"vid{i:08d}xyz" for i in range(count)]
+    return pd.DataFrame({
+        "Video ID": ids,
+        "Titulo": [f"Gameplay épico parte {i} | Sin comentarios 4K" for i in range(count)],
+        "Publicado": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "Miniatura": [f"https://i.ytimg.com/vi/{vid}/mqdefault.jpg" for vid in ids],
+        "Duracion": [f"PT{m}M{s}S" for m, s in zip(rng.integers(1, 60, count), rng.integers(0, 60, count))],
+        "Vistas": rng.integers(0, 5_000_000, count),
+        "Likes": rng.integers(0, 100_000, count),
+        "Comentarios": rng.integers(0, 10_000, count),
+    })
+
+def _rss_kb():
+    """RSS actual del proceso en KB (Linux); si no, el pico de RSS."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _load(fmt, path):
+    """Se ejecuta en un subproceso: carga la caché y devuelve tiempo y RSS."""
+    import src.core.cache_store as store
+    rss_before = _rss_kb()
+    start = time.perf_counter()
+    df = store._read(path, fmt)
+    if fmt == "csv":
+        df = store.apply_schema(df, "videos")
+    else:
+        # Forzar materialización de las columnas para medir el coste real
+        df["Publicado"].dt.year.sum()
+    elapsed = time.perf_counter() - start
+    rss_after = _rss_kb()
+    print(json.dumps({"seconds": elapsed, "rss_kb": rss_after - rss_before, "rows": len(df)}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=20000)
+    parser.add_argument("--load", nargs=2, metavar=("FORMAT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.load:
+        return _load(*args.load)
+
+    from src.core.cache_store import EXTENSIONS, apply_schema, _write
+    df = apply_schema(synthetic_videos(args.videos), "videos")
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.videos:,} videos")
+        for fmt in ("csv", "parquet", "arrow"):
+            path = os.path.join(tmp, f"videos{EXTENSIONS[fmt]}")
+            _write(df, path, fmt)
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_cache_format", "--load", fmt, path],
+                                 capture_output=True, text=True, check=True)
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{fmt:8s} tamaño {os.path.getsize(path) / 1e6:6.2f} MB  carga {result['seconds'] * 1000:8.1f} ms"
+                  f"  RSS +{result['rss_kb'] / 1024:6.1f} MB")
+
+if __name__ == "__main__":
+    main()
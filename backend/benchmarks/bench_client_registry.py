@@ -0,0 +1,34 @@
+"""Micro-benchmark: coste por llamada de obtener el cliente de YouTube.
+
+Compara ``build()`` en cada llamada (comportamiento anterior) con el registro
+compartido de ``src.services.youtube_clients``. No hace peticiones de red: mide
+sólo la construcción del cliente y de la petición.
+
+Uso (desde ``backend/``):
+    python -m benchmarks.bench_client_registry --calls 200
+"""
+import argparse
+import time
+from googleapiclient.discovery import build
+from src.services.youtube_clients import get_service
+
+def _per_call_ms(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn().videos().list(part="statistics", id="dQw4w9WgXcQ")
+    return (time.perf_counter() - start) * 1000 / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    before = _per_call_ms(lambda: build("youtube", "v3", developerKey="bench-key"), args.calls)
+    after = _per_call_ms(lambda: get_service("youtube", "v3", "bench-key", developerKey="bench-key"), args.calls)
+
+    print(f"build() por llamada : {before:8.3f} ms")
+    print(f"registro compartido : {after:8.3f} ms")
+    print(f"mejora              : {before / after:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: compresión de /api/videos (bytes en la red y CPU del servidor).
+
+1. Tamaño y CPU de compresión del JSON del catálogo sintético con cada
+   codificación/nivel.
+2. Peticiones ``GET /api/videos`` contra la app real (caché de respuestas
+   caliente): sin comprimir, comprimiendo en cada petición (como haría un
+   middleware) y con el payload precomprimido una vez por versión.
+
+Uso (desde ``backend/``):
+    python -m benchmarks.bench_compression --rows 10000 --requests 200
+"""
+import argparse
+import gzip
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+# La app usa una BD y una caché aisladas en un directorio temporal
+BENCH_DIR = tempfile.mkdtemp(prefix="bench_compression_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+
+from src.core.cache_store import apply_schema
+from src.core.serialization import frame_to_json
+from benchmarks.bench_cache_format import synthetic_videos
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def codecs():
+    yield "gzip-1", lambda body: gzip.compress(body, compresslevel=1, mtime=0)
+    yield "gzip-6", lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+    yield "gzip-9", lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield "br-4", lambda body: brotli.compress(body, quality=4)
+        yield "br-5", lambda body: brotli.compress(body, quality=5)
+        yield "br-11", lambda body: brotli.compress(body, quality=11)
+
+def cpu_ms(fn, repeat):
+    cpus = []
+    for _ in range(repeat):
+        cpu = time.process_time()
+        fn()
+        cpus.append((time.process_time() - cpu) * 1000)
+    return statistics.median(cpus)
+
+def bench_codecs(body, repeat):
+    print(f"\nJSON sin comprimir: {len(body):,} bytes")
+    print(f"{'codec':<8} {'bytes':>12} {'ratio':>7} {'CPU ms':>9}")
+    for name, fn in codecs():
+        size = len(fn(body))
+        print(f"{name:<8} {size:>12,} {len(body) / size:7.1f} {cpu_ms(lambda: fn(body), repeat):9.2f}")
+
+def bench_endpoint(df, requests):
+    """Peticiones reales a la app con la caché de respuestas ya caliente."""
+    from fastapi.testclient import TestClient
+    import main
+    from src.core import compression
+    from src.services.video_query import write_videos
+
+    write_videos(df, "UCBENCH")
+    client = TestClient(main.app)
+    headers = {"x-youtube-channel-id": "UCBENCH"}
+    client.get("/api/videos", headers=headers)  # Llena la caché de respuestas
+    payload = next(iter(main.response_cache._entries.values()))[1]
+
+    def per_request(encoding):
+        # Simula comprimir en cada petición: se descarta la variante precomprimida
+        def call():
+            payload._encoded.clear()
+            return client.get("/api/videos", headers={**headers, "accept-encoding": encoding})
+        return call
+
+    modes = [("identity", lambda: client.get("/api/videos", headers={**headers, "accept-encoding": "identity"}))]
+    for encoding in compression.ENCODINGS:
+        modes.append((f"{encoding} por petición", per_request(encoding)))
+        modes.append((f"{encoding} precomp.", lambda e=encoding: client.get("/api/videos", headers={**headers, "accept-encoding": e})))
+
+    print(f"\n{'modo':<20} {'bytes red':>12} {'p50 ms':>9} {'CPU ms/pet':>11}")
+    for name, call in modes:
+        response = call()
+        wire = len(response.content) if "content-encoding" not in response.headers else int(response.headers["content-length"])
+        walls, cpus = [], []
+        for _ in range(requests):
+            wall, cpu = time.perf_counter(), time.process_time()
+            call()
+            walls.append((time.perf_counter() - wall) * 1000)
+            cpus.append((time.process_time() - cpu) * 1000)
+        print(f"{name:<20} {wire:>12,} {statistics.median(walls):9.2f} {statistics.mean(cpus):11.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    df = apply_schema(synthetic_videos(args.rows), "videos")
+    bench_codecs(frame_to_json(df), args.repeat)
+
+    os.chdir(BENCH_DIR)
+    os.makedirs("data", exist_ok=True)
+    try:
+        bench_endpoint(df, args.requests)
+    finally:
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark: serialización de /api/videos (to_dict + jsonable_encoder vs bytes directos).
+
+Para cada tamaño mide latencia p50/p99 (reloj de pared) y CPU media por
+petición de ambos caminos, sobre un catálogo sintético ya cargado en memoria.
+
+Uso (desde ``backend/``):
+    python -m benchmarks.bench_json --rows 1000 10000 50000 --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from src.core.cache_store import apply_schema
+from src.core.serialization import frame_to_json, _format_dates
+from benchmarks.bench_cache_format import synthetic_videos
+
+def legacy(df):
+    """Camino anterior: records de Python + jsonable_encoder + JSONResponse."""
+    records = _format_dates(df).to_dict(orient="records")
+    return JSONResponse(jsonable_encoder(records)).body
+
+def measure(fn, df, repeat):
+    walls, cpus = [], []
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        fn(df)
+        walls.append((time.perf_counter() - wall) * 1000)
+        cpus.append((time.process_time() - cpu) * 1000)
+    walls.sort()
+    p99 = walls[min(len(walls) - 1, int(len(walls) * 0.99))]
+    return statistics.median(walls), p99, statistics.mean(cpus)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'filas':>7} {'camino':<10} {'p50 ms':>9} {'p99 ms':>9} {'CPU ms':>9}")
+    for rows in args.rows:
+        df = apply_schema(synthetic_videos(rows), "videos")
+        assert json.loads(legacy(df)) == json.loads(frame_to_json(df)), "los dos caminos deben producir el mismo JSON"
+        for name, fn in (("anterior", legacy), ("rápido", frame_to_json)):
+            p50, p99, cpu = measure(fn, df, args.repeat)
+            print(f"{rows:>7,} {name:<10} {p50:9.2f} {p99:9.2f} {cpu:9.2f}")
+
+if __name__ == "__main__":
+    main()
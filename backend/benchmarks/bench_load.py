@@ -0,0 +1,314 @@
+"""Benchmark de carga sin red contra el servidor falso de YouTube.
+
+Lanza ``benchmarks.fake_youtube`` en un subproceso, apunta el backend a él
+(``YOUTUBE_API_ENDPOINT`` / ``YOUTUBE_ANALYTICS_API_ENDPOINT``) con una BD y
+una caché aisladas, y mide:
+
+1. ``fetch_all_videos`` de ``--channels`` canales en paralelo.
+2. ``fetch_daily_stats`` del historial completo de cada canal.
+3. ``cron_sync`` (``sync_daily_metrics_for_all_channels``) desde la BD vacía.
+4. Los endpoints de FastAPI servidos por uvicorn, con ``--concurrency``
+   clientes keep-alive: ``/api/videos`` (completo y paginado),
+   ``/api/analytics``, ``/api/rollups`` y ``/api/channel`` (que sí llama a la API).
+
+Por escenario: operaciones/s, p50/p99 en ms, pico de RSS sobre el inicial y
+llamadas servidas por el servidor falso. ``--json`` guarda el resultado y
+``--baseline`` lo compara con uno anterior: sale con código 1 si el
+throughput baja o el p99 sube más de ``--tolerance`` (para CI).
+
+Uso (desde ``backend/``):
+    python -m benchmarks.bench_load --channels 4 --videos 2000 --latency-ms 20 --json bench.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from benchmarks.bench_cache_format import _rss_kb
+
+SCENARIOS = ("fetch_all_videos", "fetch_daily_stats", "cron_sync", "endpoints")
+ENDPOINTS = (
+    ("videos", "/api/videos"),
+    ("videos_page", "/api/videos?sort=views&limit=50"),
+    ("analytics", "/api/analytics"),
+    ("rollups", "/api/rollups"),
+    ("channel", "/api/channel"),
+)
+
+class RssSampler:
+    """Muestrea el RSS del proceso en un hilo para conocer el pico de un escenario."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_kb = self.peak_kb = _rss_kb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_kb = max(self.peak_kb, _rss_kb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, _rss_kb())
+
+    @property
+    def peak_delta_mb(self):
+        return round((self.peak_kb - self.start_kb) / 1024, 1)
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def start_fake_server(args):
+    """Arranca el servidor falso en un subproceso y devuelve (proceso, url)."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_youtube", "--port", "0", "--videos", str(args.videos),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms), "--error-rate", str(args.error_rate)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    url = process.stdout.readline().strip()
+    if not url:
+        process.kill()
+        raise RuntimeError("fake_youtube did not start")
+    return process, url
+
+def upstream_total(url):
+    with urllib.request.urlopen(url + "_stats") as response:
+        return json.load(response)["total"]
+
+def run_scenario(name, url, fn, ops):
+    """Ejecuta ``fn`` (devuelve latencias en s por operación) y arma la fila de resultados."""
+    calls_before = upstream_total(url)
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        latencies = fn()
+        elapsed = time.perf_counter() - started
+    result = {
+        "scenario": name,
+        "ops": ops,
+        "seconds": round(elapsed, 3),
+        "ops_per_s": round(ops / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "rss_peak_mb": rss.peak_delta_mb,
+        "upstream_calls": upstream_total(url) - calls_before,
+    }
+    print(f"{name:<24} {ops:>6} {result['seconds']:>8.2f} {result['ops_per_s']:>9.1f} {result['p50_ms']:>9.2f} "
+          f"{result['p99_ms']:>9.2f} {result['rss_peak_mb']:>8.1f} {result['upstream_calls']:>9}", flush=True)
+    return result
+
+def timed_map(fn, items, workers):
+    """Aplica ``fn`` en paralelo y devuelve la latencia de cada llamada."""
+    def timed(item):
+        started = time.perf_counter()
+        fn(item)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(timed, items))
+
+def seed_channels(channel_ids):
+    """Canales con un token vigente (cifrado) para que Analytics no intente refrescar."""
+    from src.core.database import SessionLocal
+    from src.core.security import encrypt_token
+    from src.db.models import Channel
+
+    expiry = datetime.utcnow() + timedelta(days=1)
+    with SessionLocal() as db:
+        for channel_id in channel_ids:
+            db.add(Channel(channel_id=channel_id, title=f"Canal {channel_id}", access_token_enc=encrypt_token("bench-token"),
+                           refresh_token_enc=encrypt_token("bench-refresh"), token_expiry=expiry))
+        db.commit()
+
+def clear_metrics():
+    from src.core.database import SessionLocal
+    from src.db.models import DailyMetric
+
+    with SessionLocal() as db:
+        db.query(DailyMetric).delete()
+        db.commit()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_api_server():
+    """uvicorn con la app real en un hilo. Devuelve (server, puerto)."""
+    import uvicorn
+    import main
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, port
+
+def endpoint_load(port, path, headers, requests, concurrency):
+    """``requests`` GET a ``path`` repartidos en ``concurrency`` conexiones keep-alive."""
+    local = threading.local()
+
+    def get(_):
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status >= 400:
+            raise RuntimeError(f"GET {path} -> {response.status}")
+
+    return timed_map(get, range(requests), concurrency)
+
+def compare(results, baseline, tolerance):
+    """Regresiones frente a ``baseline``: throughput más bajo o p99 más alto que la tolerancia."""
+    previous = {row["scenario"]: row for row in baseline.get("results", [])}
+    regressions = []
+    for row in results:
+        before = previous.get(row["scenario"])
+        if not before:
+            continue
+        if before["ops_per_s"] and row["ops_per_s"] < before["ops_per_s"] * (1 - tolerance):
+            regressions.append(f"{row['scenario']}: {row['ops_per_s']} ops/s (antes {before['ops_per_s']})")
+        if before["p99_ms"] and row["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{row['scenario']}: p99 {row['p99_ms']} ms (antes {before['p99_ms']})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--videos", type=int, default=2000, help="videos por canal")
+    parser.add_argument("--days", type=int, default=730, help="días de historial de Analytics")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="latencia del servidor falso")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de 503 (ejercita reintentos)")
+    parser.add_argument("--concurrency", type=int, default=8, help="clientes / canales en paralelo")
+    parser.add_argument("--requests", type=int, default=300, help="peticiones por endpoint")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--verbose", action="store_true", help="muestra el log INFO del backend")
+    parser.add_argument("--json", help="guarda los resultados en este archivo")
+    parser.add_argument("--baseline", help="resultados anteriores (--json) con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="margen antes de contar una regresión")
+    args = parser.parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+
+    bench_dir = tempfile.mkdtemp(prefix="bench_load_")
+    fake, url = start_fake_server(args)
+    yesterday = date.today() - timedelta(days=1)
+    # Configuración leída al importar src: BD/caché aisladas, endpoints falsos, sin límites ni presupuesto
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(bench_dir, 'bench.db')}",
+        "YOUTUBE_API_ENDPOINT": url,
+        "YOUTUBE_ANALYTICS_API_ENDPOINT": url,
+        "API_KEY": "bench-key",
+        "API_RATE_LIMIT": "0",
+        "API_BACKOFF_BASE": "0.05",
+        "QUOTA_DAILY_BUDGET": "0",
+        "TOKEN_REFRESH_INTERVAL": "0",
+        "SLOW_REQUEST_MS": "1000000",
+        "SYNC_START_DATE": (yesterday - timedelta(days=args.days - 1)).isoformat(),
+    })
+    os.environ.setdefault("ENCRYPTION_KEY", "Zm9yLWJlbmNobWFya3Mtb25seS0zMi1ieXRlcy1rZXk=")
+    os.chdir(bench_dir)
+    os.makedirs("data", exist_ok=True)
+
+    channel_ids = [f"UCBENCH{n:04d}" for n in range(args.channels)]
+    results = []
+    try:
+        from src.db.init_db import init_db
+        init_db()
+        seed_channels(channel_ids)
+
+        from src.services.fetch_data import fetch_all_videos
+        from src.services.fetch_daily import fetch_daily_stats
+        from src.services.cron_sync import sync_daily_metrics_for_all_channels
+        from src.services.video_query import write_videos
+        if not args.verbose:
+            logging.getLogger("youtube_dashboard").setLevel(logging.WARNING)  # Que no se mezcle con la tabla
+
+        print(f"\nServidor falso: {url} ({args.videos} videos/canal, {args.latency_ms} ms)")
+        print(f"{'escenario':<24} {'ops':>6} {'s':>8} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8} {'llamadas':>9}")
+
+        if "fetch_all_videos" in scenarios:
+            catalogs = {}
+
+            def fetch(channel_id):
+                catalogs[channel_id] = fetch_all_videos(channel_id, "bench-key")
+
+            results.append(run_scenario("fetch_all_videos", url,
+                                        lambda: timed_map(fetch, channel_ids, args.concurrency), len(channel_ids)))
+            for channel_id, df in catalogs.items():
+                write_videos(df, channel_id)  # Los endpoints leen esta caché
+
+        if "fetch_daily_stats" in scenarios:
+            start = os.environ["SYNC_START_DATE"]
+            results.append(run_scenario(
+                "fetch_daily_stats", url,
+                lambda: timed_map(lambda cid: fetch_daily_stats(cid, start_date=start, end_date=yesterday.isoformat()),
+                                  channel_ids, args.concurrency),
+                len(channel_ids)))
+
+        if "cron_sync" in scenarios:
+            clear_metrics()
+
+            def cron():
+                started = time.perf_counter()
+                sync_daily_metrics_for_all_channels(workers=args.concurrency)
+                return [time.perf_counter() - started]
+
+            results.append(run_scenario("cron_sync", url, cron, 1))
+
+        if "endpoints" in scenarios:
+            server, port = start_api_server()
+            try:
+                for name, path in ENDPOINTS:
+                    headers = {"x-youtube-channel-id": channel_ids[0], "x-youtube-api-key": "bench-key"}
+                    endpoint_load(port, path, headers, 1, 1)  # Calienta cachés y clientes
+                    results.append(run_scenario(
+                        f"GET {name}", url,
+                        lambda: endpoint_load(port, path, headers, args.requests, args.concurrency),
+                        args.requests))
+            finally:
+                server.should_exit = True
+    finally:
+        fake.terminate()
+        fake.wait()
+        os.chdir("/")
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+    report = {
+        "config": {key: getattr(args, key) for key in ("channels", "videos", "days", "latency_ms", "concurrency", "requests")},
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Servidor HTTP local que imita la YouTube Data API v3 y YouTube Analytics v2.
+
+Sirve canales sintéticos deterministas para medir el backend sin red:
+
+- ``GET /youtube/v3/channels``: snippet, statistics y la playlist de uploads.
+- ``GET /youtube/v3/playlistItems``: uploads del más reciente al más antiguo,
+  paginados (``maxResults``/``pageToken``).
+- ``GET /youtube/v3/videos``: snippet, contentDetails y statistics por ID.
+- ``GET /v2/reports``: filas por día (``dimensions=day``) o un top por otra
+  dimensión, con ``columnHeaders`` tipados.
+- ``GET /_stats``: peticiones servidas por ruta (para el arnés).
+
+``POST /batch`` responde 404, como un endpoint sin batch: el cliente cae al
+modo en paralelo. Cada respuesta espera ``latency`` segundos (más jitter) y
+una fracción ``error_rate`` devuelve 503 para ejercitar los reintentos.
+
+El backend se apunta aquí con ``YOUTUBE_API_ENDPOINT`` y
+``YOUTUBE_ANALYTICS_API_ENDPOINT``.
+
+Uso (desde ``backend/``):
+    python -m benchmarks.fake_youtube --port 8765 --videos 5000 --latency-ms 30
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+EPOCH = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DIMENSION_VALUES = {
+    "country": ["US", "MX", "ES", "AR", "CO", "CL", "PE", "BR"],
+    "deviceType": ["MOBILE", "DESKTOP", "TV", "TABLET"],
+    "insightTrafficSourceType": ["YT_SEARCH", "SUBSCRIBER", "RELATED_VIDEO", "EXT_URL", "NOTIFICATION"],
+}
+
+def _count(seed, scale):
+    """Contador pseudoaleatorio estable para (``seed``) en [0, scale)."""
+    return (seed * 2654435761) % 4294967296 % scale
+
+class FakeYouTube:
+    """Datos sintéticos: cada canal tiene ``videos`` videos (índice 0 = el más antiguo)."""
+
+    def __init__(self, videos=1000, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.videos = videos
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self._lock = threading.Lock()
+
+    def _video_id(self, channel_id, index):
+        return f"{channel_id}-v{index:06d}"
+
+    def _parse_video_id(self, video_id):
+        channel_id, _, index = video_id.rpartition("-v")
+        return channel_id, int(index)
+
+    def channel(self, channel_id):
+        return {
+            "kind": "youtube#channel",
+            "id": channel_id,
+            "snippet": {
+                "title": f"Canal {channel_id}",
+                "thumbnails": {"default": {"url": f"https://example.invalid/{channel_id}.jpg"}},
+            },
+            "contentDetails": {"relatedPlaylists": {"uploads": "UU" + channel_id}},
+            "statistics": {
+                "subscriberCount": str(_count(zlib.crc32(channel_id.encode()) & 0xFFFF, 1_000_000)),
+                "viewCount": str(self.videos * 10_000),
+                "videoCount": str(self.videos),
+            },
+        }
+
+    def playlist_page(self, playlist_id, max_results, page_token):
+        channel_id = playlist_id[2:]
+        offset = int(page_token or 0)
+        end = min(self.videos, offset + max_results)
+        items = [
+            {"contentDetails": {"videoId": self._video_id(channel_id, self.videos - 1 - position)}}
+            for position in range(offset, end)
+        ]
+        page = {"kind": "youtube#playlistItemListResponse", "items": items,
+                "pageInfo": {"totalResults": self.videos, "resultsPerPage": max_results}}
+        if end < self.videos:
+            page["nextPageToken"] = str(end)
+        return page
+
+    def video(self, video_id, parts):
+        channel_id, index = self._parse_video_id(video_id)
+        item = {"kind": "youtube#video", "id": video_id}
+        if "snippet" in parts:
+            published = EPOCH + timedelta(hours=12 * index)
+            item["snippet"] = {
+                "title": f"Gameplay épico parte {index} | {channel_id}",
+                "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "thumbnails": {"medium": {"url": f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"}},
+            }
+        if "contentDetails" in parts:
+            item["contentDetails"] = {"duration": f"PT{1 + index % 59}M{index % 60}S"}
+        if "statistics" in parts:
+            item["statistics"] = {
+                "viewCount": str(_count(index + 1, 5_000_000)),
+                "likeCount": str(_count(index + 7, 100_000)),
+                "commentCount": str(_count(index + 13, 10_000)),
+            }
+        return item
+
+    def report(self, channel_id, start, end, metrics, dimensions, max_results=None):
+        metrics = [m for m in metrics.split(",") if m]
+        dimension = dimensions or "day"
+        headers = [{"name": dimension, "columnType": "DIMENSION", "dataType": "STRING"}]
+        headers += [{"name": m, "columnType": "METRIC", "dataType": "INTEGER"} for m in metrics]
+        seed = zlib.crc32(channel_id.encode()) & 0xFFFF
+
+        if dimension == "day":
+            keys = [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+        elif dimension == "video":
+            keys = [self._video_id(channel_id, self.videos - 1 - n) for n in range(min(self.videos, max_results or 200))]
+        else:
+            keys = DIMENSION_VALUES.get(dimension, ["UNKNOWN"])
+        rows = [
+            [key, *(_count(seed + position * 31 + column, 50_000) for column in range(len(metrics)))]
+            for position, key in enumerate(keys)
+        ]
+        return {"kind": "youtubeAnalytics#resultTable", "columnHeaders": headers, "rows": rows}
+
+    def handle(self, method, path, query):
+        """(status, body) de una petición."""
+        if path == "/_stats":  # Sin latencia y sin contarse a sí misma
+            with self._lock:
+                return 200, {"requests": dict(self.requests), "total": sum(self.requests.values())}
+        with self._lock:
+            self.requests[f"{method} {path}"] += 1
+            fail = self.error_rate and self.random.random() < self.error_rate
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return 503, _error(503, "backendError", "Injected failure")
+
+        arg = lambda name, default=None: query.get(name, [default])[0]
+        if method == "GET" and path == "/youtube/v3/channels":
+            ids = [cid for cid in (arg("id") or "").split(",") if cid]
+            return 200, {"kind": "youtube#channelListResponse", "items": [self.channel(cid) for cid in ids]}
+        if method == "GET" and path == "/youtube/v3/playlistItems":
+            return 200, self.playlist_page(arg("playlistId", ""), int(arg("maxResults", 5)), arg("pageToken"))
+        if method == "GET" and path == "/youtube/v3/videos":
+            parts = set((arg("part") or "").split(","))
+            ids = [vid for vid in (arg("id") or "").split(",") if vid]
+            return 200, {"kind": "youtube#videoListResponse", "items": [self.video(vid, parts) for vid in ids]}
+        if method == "GET" and path == "/v2/reports":
+            channel_id = (arg("ids") or "").removeprefix("channel==")
+            start, end = date.fromisoformat(arg("startDate")), date.fromisoformat(arg("endDate"))
+            max_results = int(arg("maxResults")) if arg("maxResults") else None
+            return 200, self.report(channel_id, start, end, arg("metrics", ""), arg("dimensions"), max_results)
+        return 404, _error(404, "notFound", f"{method} {path} is not emulated")
+
+def _error(code, reason, message):
+    return {"error": {"code": code, "message": message, "errors": [{"reason": reason, "message": message}]}}
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, como Google
+
+        def _serve(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            url = urlparse(self.path)
+            status, payload = api.handle(method, url.path, parse_qs(url.query))
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self._serve("POST")
+
+        def log_message(self, format, *args):
+            pass  # Sin una línea por petición
+
+    return Handler
+
+def serve(api, host="127.0.0.1", port=0):
+    """Crea el servidor (``port=0`` elige uno libre); ``server.server_address`` da el puerto."""
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    return server
+
+def start_in_thread(api, host="127.0.0.1", port=0):
+    """Arranca el servidor en un hilo daemon. Devuelve (server, url base)."""
+    server = serve(api, host, port)
+    threading.Thread(target=server.serve_forever, name="fake-youtube", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 = puerto libre")
+    parser.add_argument("--videos", type=int, default=1000, help="videos por canal")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latencia por respuesta")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="latencia extra aleatoria (0..N)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 503")
+    args = parser.parse_args()
+
+    api = FakeYouTube(videos=args.videos, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                      error_rate=args.error_rate)
+    server = serve(api, args.host, args.port)
+    # Primera línea de stdout: la URL base (el arnés la lee al lanzarlo como subproceso)
+    print(f"http://{args.host}:{server.server_address[1]}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
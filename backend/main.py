@@ -7,25 +7,61 @@ if "REQUESTS_CA_BUNDLE" in os.environ:
     if not os.path.exists(os.environ["REQUESTS_CA_BUNDLE"]):
         del os.environ["REQUESTS_CA_BUNDLE"]
 
-from fastapi import FastAPI, HTTPException, Header, Request as FastAPIRequest
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Header, Depends, Query, Request as FastAPIRequest
+from fastapi.responses import RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import pandas as pd
 import os
 import time
 
+from contextlib import asynccontextmanager
+
+from datetime import date, datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from googleapiclient.discovery import build
 from typing import Optional
+from sqlalchemy.orm import Session
 from src.services.fetch_data import fetch_all_videos
-from src.services.fetch_daily import fetch_daily_stats
-from src.core.config import logger, API_KEY
-from src.core.database import Base, engine
+from src.services.video_query import write_videos, load_sort_index, query_videos, InvalidQueryError
+from src.services.rollups import load_rollups, rollups_mtime, rollups_to_dict, update_video_rollups, update_daily_rollups
+from src.services.refresh_jobs import refresh_jobs, QueueFullError
+from src.services.token_refresher import token_refresher
+from src.services.analytics_reports import fetch_reports
+from src.services.auth_service import get_channel_by_id
+from src.services.metrics_service import get_daily_metrics, top_up_daily_metrics
+from src.services.youtube_clients import YouTubeAPIError, api_key_id, channel_key_id
+from src.services.quota_ledger import usage as quota_usage, flush as flush_quota
+from src.services import cron_status  # noqa: F401 Register the cron sync /metrics collector
+from src.core.config import logger, API_KEY, COMPRESSION_MIN_SIZE, COMPRESSION_LEVEL, ANALYTICS_TOPUP_MAX_DAYS
+from src.core.database import Base, engine, get_db, check_dialect
+from src.core.cache_store import read_cache, apply_schema, cache_mtime
+from src.core.response_cache import response_cache, CachedPayload
+from src.core.compression import ENCODINGS, negotiate
+from src.core.metrics import registry, MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from src.core.tracing import TracingMiddleware, ROUTE_CLASS
+from src.core.serialization import frame_to_json, dumps
+from src.core.singleflight import SingleFlight
 from src.db.models import Channel  # noqa: F401 Register models
+from src.db.init_db import upgrade_schema
 
 # Create Tables
+check_dialect(engine)  # Upserts need ON CONFLICT: fail here, not on every sync or quota charge
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Refresh OAuth tokens ahead of expiry so requests never wait on Google
+    token_refresher.start()
+    yield
+    token_refresher.stop()
+    flush_quota()  # Quota charges still buffered in memory
 
-app = FastAPI(title="AJDREW Analytics API")
+app = FastAPI(title="AJDREW Analytics API", lifespan=lifespan)
+# ProfiledRoute only with PROFILE_REQUESTS; otherwise endpoints are registered unwrapped
+app.router.route_class = ROUTE_CLASS
+flights = SingleFlight()  # Coalesces concurrent cache-miss fetches per channel
 
 # Setup CORS for React Frontend
 app.add_middleware(
@@ -33,47 +69,159 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Total-Count", "X-Next-Cursor", "X-Request-ID", "X-Data-Stale"],
 )
+if "gzip" in ENCODINGS:
+    # Uncached responses; precompressed payloads already carry Content-Encoding and are skipped
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=COMPRESSION_LEVEL)
+# Times the whole request, compression included
+app.add_middleware(MetricsMiddleware)
+# Outermost: request id + trace spans + slow-request log
+app.add_middleware(TracingMiddleware)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to AJDREW Analytics API", "status": "online"}
 
-def get_cache_path(filename, channel_id=None):
-    """Helper to get namespaced cache path."""
-    if channel_id:
-        return os.path.join("data", f"{channel_id}_{filename}")
-    return os.path.join("data", filename)
+def _etag_base(tag: str) -> str:
+    """Strips the weak prefix and the per-encoding suffix so any representation matches."""
+    tag = tag.strip().removeprefix("W/")
+    for encoding in ("gzip", "br"):
+        tag = tag.replace(f'-{encoding}"', '"')
+    return tag
+
+def _not_modified(request: FastAPIRequest, payload: CachedPayload) -> bool:
+    """Evaluates If-None-Match (preferred) or If-Modified-Since against the payload."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [_etag_base(tag) for tag in if_none_match.split(",")]
+        return "*" in tags or payload.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and payload.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(payload.last_modified) <= since
+    return False
+
+def payload_response(request: FastAPIRequest, payload: CachedPayload):
+    """200 with the cached JSON body, or 304 when the client copy is still current.
+
+    Bodies above COMPRESSION_MIN_SIZE are sent brotli/gzip-encoded when the
+    client accepts it; each payload is compressed once per encoding.
+    """
+    encoding = negotiate(request.headers.get("accept-encoding"), len(payload.body))
+    headers = {"ETag": payload.etag_for(encoding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding", **payload.headers}
+    if payload.last_modified is not None:
+        headers["Last-Modified"] = formatdate(payload.last_modified, usegmt=True)
+    if _not_modified(request, payload):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=payload.encoded(encoding), media_type="application/json", headers=headers)
+
+def fetch_and_cache_videos(channel_id, api_key):
+    """Fetches the full catalog and writes the cache; runs once per channel via single-flight."""
+    df = read_cache("videos", channel_id)  # Another flight may have just filled it
+    if df is not None:
+        return df
+    df = fetch_all_videos(channel_id, api_key)
+    if not df.empty:
+        write_videos(df, channel_id)
+    return apply_schema(df, "videos")
+
+def upstream_error(e: YouTubeAPIError):
+    """429 when YouTube throttled us or the quota is spent (retrying later helps), 502 otherwise."""
+    throttled = e.status == 429 or e.quota_exceeded or (e.retryable and e.status == 403)
+    return HTTPException(status_code=429 if throttled else 502, detail=str(e),
+                         headers={"Retry-After": "60"} if throttled else None)
+
+def videos_payload(df, channel_id, query):
+    """Serializes one page of the catalog; pagination info goes in X-Total-Count / X-Next-Cursor."""
+    if not any(query.values()):
+        return CachedPayload(frame_to_json(df), cache_mtime("videos", channel_id))
+    index = load_sort_index(df, channel_id) if query["sort"] else None
+    page, total, next_cursor = query_videos(
+        df, index,
+        sort=query["sort"],
+        order=query["order"] or "desc",
+        published_after=query["published_after"],
+        limit=query["limit"],
+        cursor=query["cursor"],
+        fields=list(query["fields"]) if query["fields"] else None,
+    )
+    headers = {"X-Total-Count": str(total)}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return CachedPayload(frame_to_json(page), cache_mtime("videos", channel_id), headers=headers)
 
 @app.get("/api/videos")
 def get_videos(
+    request: FastAPIRequest,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    order: Optional[str] = None,
+    fields: Optional[str] = None,
+    published_after: Optional[datetime] = None,
     x_youtube_channel_id: Optional[str] = Header(None),
     x_youtube_api_key: Optional[str] = Header(None)
 ):
-    """Returns videos. Auto-fetches if cache missing and API key provided."""
+    """Returns videos. Auto-fetches if cache missing and API key provided.
+
+    Without query params the whole catalog is returned in playlist order.
+    ``sort`` (views | likes | published) and ``order`` (desc | asc) use the
+    persisted sort index, ``published_after`` filters by upload date, ``fields``
+    is a comma-separated column projection and ``limit``/``cursor`` paginate:
+    the next page's cursor comes in ``X-Next-Cursor`` and the filtered total
+    in ``X-Total-Count``.
+    """
     target_channel_id = x_youtube_channel_id
     if not target_channel_id:
         return []
-        
-    csv_path = get_cache_path("videos.csv", x_youtube_channel_id)
 
-    if os.path.exists(csv_path):
-        try:
-            df = pd.read_csv(csv_path)
+    query = {
+        "sort": sort,
+        "order": order,
+        "published_after": published_after,
+        "limit": limit,
+        "cursor": cursor,
+        "fields": tuple(field.strip() for field in fields.split(",") if field.strip()) if fields else None,
+    }
+    cache_key = ("videos", target_channel_id, tuple(query.items()))
+    payload = response_cache.get(cache_key)
+    if payload is not None:
+        return payload_response(request, payload)
+
+    try:
+        df = read_cache("videos", target_channel_id)
+        if df is not None:
             logger.info(f"API Success: Loaded {len(df)} videos from cache for {target_channel_id}")
-            return df.to_dict(orient="records")
-        except Exception as e:
-            logger.error(f"Error reading cache: {e}")
+            payload = videos_payload(df, target_channel_id, query)
+            response_cache.set(cache_key, payload)
+            return payload_response(request, payload)
+    except InvalidQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reading cache: {e}")
     
-    # If cache missing and we have creds, try to fetch
+    # If cache missing and we have creds, try to fetch (one fetch per channel at a time)
     if x_youtube_api_key and x_youtube_channel_id:
         logger.info(f"Cache miss for {target_channel_id}. Fetching live data...")
         try:
-            df = fetch_all_videos(target_channel_id, x_youtube_api_key)
+            df = flights.do(("videos", target_channel_id), fetch_and_cache_videos, target_channel_id, x_youtube_api_key)
             if not df.empty:
-                os.makedirs("data", exist_ok=True)
-                df.to_csv(csv_path, index=False, encoding="utf-8-sig")
-                return df.to_dict(orient="records")
+                payload = videos_payload(df, target_channel_id, query)
+                response_cache.set(cache_key, payload)
+                return payload_response(request, payload)
+        except InvalidQueryError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except YouTubeAPIError as e:
+            logger.error(f"YouTube API error fetching live data for {target_channel_id}: {e}")
+            raise upstream_error(e)
         except Exception as e:
             logger.error(f"Error fetching live data: {e}")
             raise HTTPException(status_code=500, detail=str(e))
@@ -83,96 +231,212 @@ def get_videos(
 
 @app.get("/api/analytics")
 def get_analytics(
-    x_youtube_channel_id: Optional[str] = Header(None)
+    request: FastAPIRequest,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    x_youtube_channel_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
 ):
-    """Returns daily stats (Global/Demo data for now if custom channel doesn't have it)."""
-    
-    csv_path = get_cache_path("daily_stats.csv", x_youtube_channel_id)
-    
-    if os.path.exists(csv_path):
-        # Check for cache expiry (4 hours)
-        file_age = time.time() - os.path.getmtime(csv_path)
-        if file_age > 14400: # 4 hours in seconds
-             logger.info(f"Cache expired for {x_youtube_channel_id} (Age: {file_age:.0f}s). Refreshing...")
-             # Fall through to fetch new data
-        else:
-            try:
-                df = pd.read_csv(csv_path)
-                logger.info(f"Analytics Cache Hit: Loaded {len(df)} rows for {x_youtube_channel_id}")
-                if 'day' in df.columns:
-                    df['day'] = df['day'].astype(str)
-                return df.to_dict(orient="records")
-            except Exception as e:
-                logger.error(f"Error reading analytics cache: {e}")
-    
-    # Cache Miss: Try to fetch if we have a valid channel ID
-    # Note: Requires stored OAuth token (token_{channel_id}.pickle or DB)
+    """Returns daily stats from the daily_metrics table (optionally within ``start``/``end``).
+
+    Days missing after the last synced one are topped up live from Analytics
+    (throttled per channel, at most the last ANALYTICS_TOPUP_MAX_DAYS days; older
+    history is left to the cron sync); the demo CSV is only used when no channel is given.
+    """
     if x_youtube_channel_id:
-        logger.info(f"Analytics Cache miss for {x_youtube_channel_id}. Attempting fetch...")
+        cache_key = ("analytics", x_youtube_channel_id, (start, end))
+        payload = response_cache.get(cache_key)
+        if payload is not None:
+            return payload_response(request, payload)
+
+        channel = get_channel_by_id(db, x_youtube_channel_id)
+        if not channel:
+            # Analytics needs stored OAuth credentials (see /api/auth/login)
+            logger.info(f"Analytics: channel {x_youtube_channel_id} is not connected.")
+            return []
+
+        stale = None
         try:
-            df = fetch_daily_stats(x_youtube_channel_id)
-            if not df.empty:
-                os.makedirs("data", exist_ok=True)
-                df.to_csv(csv_path, index=False, encoding="utf-8-sig")
-                if 'day' in df.columns:
-                    df['day'] = df['day'].astype(str)
-                return df.to_dict(orient="records")
+            # Concurrent misses for the same channel share one Analytics call
+            added = flights.do(("analytics", x_youtube_channel_id, end), top_up_daily_metrics, db, channel, end_date=end,
+                               max_days=ANALYTICS_TOPUP_MAX_DAYS)
+            if added:
+                logger.info(f"Analytics top-up: stored {added} new days for {x_youtube_channel_id}")
+                response_cache.invalidate(x_youtube_channel_id)
         except Exception as e:
-             logger.error(f"Error fetching daily stats: {e}")
-             # Don't crash, just return empty so UI shows warning
-    
-    # Fallback to default demo data ONLY if we failed to fetch/load custom data and have no ID
-    if not x_youtube_channel_id:
-        default_path = os.path.join("data", "daily_stats.csv")
-        if os.path.exists(default_path):
-             df = pd.read_csv(default_path)
-             if 'day' in df.columns: df['day'] = df['day'].astype(str)
-             return df.to_dict(orient="records")
+            db.rollback()
+            logger.error(f"Error topping up daily stats: {e}")
+            # Don't crash: serve what we already have, flagged as stale and left uncached
+            stale = getattr(e, "reason", None) or type(e).__name__
+        finally:
+            flush_quota()
+
+        records = get_daily_metrics(db, channel.id, start=start, end=end)
+        logger.info(f"Analytics: Loaded {len(records)} rows for {x_youtube_channel_id}")
+        last_updated = channel.last_updated
+        if last_updated is not None and last_updated.tzinfo is None:
+            last_updated = last_updated.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC
+        payload = CachedPayload(dumps(records), last_updated.timestamp() if last_updated else None,
+                                headers={"X-Data-Stale": stale} if stale else None)
+        if records and not stale:
+            response_cache.set(cache_key, payload)
+        return payload_response(request, payload)
+
+    # Fallback to default demo data ONLY when no channel ID is given
+    df = read_cache("daily_stats")
+    if df is not None:
+        return Response(content=frame_to_json(df), media_type="application/json")
 
     return []
 
-@app.post("/api/refresh")
+@app.get("/api/reports")
+def get_reports(
+    request: FastAPIRequest,
+    reports: str = "daily",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    x_youtube_channel_id: Optional[str] = Header(None)
+):
+    """Several Analytics reports for one channel in a single call.
+
+    ``reports`` is a comma-separated list (daily, videos, traffic_sources,
+    countries, devices). Missing reports are fetched upstream in one batched
+    round trip and cached per (channel, report, date range).
+    """
+    if not x_youtube_channel_id:
+        return {}
+
+    names = tuple(dict.fromkeys(name.strip() for name in reports.split(",") if name.strip()))
+    cache_key = ("reports", x_youtube_channel_id, (names, start, end))
+    payload = response_cache.get(cache_key)
+    if payload is not None:
+        return payload_response(request, payload)
+
+    try:
+        frames = fetch_reports(
+            x_youtube_channel_id, names,
+            start_date=start.isoformat() if start else None,
+            end_date=end.isoformat() if end else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    body = b"{" + b",".join(dumps(name) + b":" + frame_to_json(df) for name, df in frames.items()) + b"}"
+    payload = CachedPayload(body, time.time())
+    if any(not df.empty for df in frames.values()):
+        response_cache.set(cache_key, payload)
+    return payload_response(request, payload)
+
+@app.get("/api/rollups")
+def get_rollups(
+    request: FastAPIRequest,
+    x_youtube_channel_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Pre-aggregated monthly, ISO-week and rolling 7D/28D totals.
+
+    ``videos`` aggregates the catalog by upload date and ``daily`` the Analytics
+    daily metrics. Both are computed when the data is synced; rollups missing
+    for data synced before they existed are built once here.
+    """
+    if not x_youtube_channel_id:
+        return {"videos": None, "daily": None}
+
+    cache_key = ("rollups", x_youtube_channel_id, ())
+    payload = response_cache.get(cache_key)
+    if payload is not None:
+        return payload_response(request, payload)
+
+    rollups = load_rollups(x_youtube_channel_id)
+    if rollups["videos"] is None:
+        df = read_cache("videos", x_youtube_channel_id)
+        if df is not None:
+            rollups["videos"] = update_video_rollups(df, x_youtube_channel_id)
+    if rollups["daily"] is None:
+        channel = get_channel_by_id(db, x_youtube_channel_id)
+        if channel:
+            rollups["daily"] = update_daily_rollups(db, channel.id, x_youtube_channel_id)
+
+    content = {source: rollups_to_dict(df) for source, df in rollups.items()}
+    payload = CachedPayload(dumps(content), rollups_mtime(x_youtube_channel_id))
+    response_cache.set(cache_key, payload)
+    return payload_response(request, payload)
+
+@app.post("/api/refresh", status_code=202)
 async def refresh_data(
+    full: bool = False,
     x_youtube_channel_id: Optional[str] = Header(None),
     x_youtube_api_key: Optional[str] = Header(None)
 ):
-    """Force refresh data (Videos & Analytics)."""
+    """Queue a background refresh (Videos & Analytics) and return its job id.
+
+    Videos are synced incrementally against the cached catalog (new uploads +
+    statistics-only refresh). Pass ``?full=true`` to re-download everything.
+    Poll ``GET /api/refresh/{job_id}`` for progress. A channel has at most one
+    active job; refreshing it again returns the running job.
+    """
     if not x_youtube_api_key:
          return {"message": "API Key required for refresh"}
     
     target_id = x_youtube_channel_id
     if not target_id:
         raise HTTPException(status_code=400, detail="Channel ID required")
-    
-    # Run sync fetch (blocking for simplicity in MVP)
+
     try:
-        # 1. Refresh Videos
-        df_videos = fetch_all_videos(target_id, x_youtube_api_key)
-        video_path = get_cache_path("videos.csv", x_youtube_channel_id)
-        os.makedirs("data", exist_ok=True)
-        df_videos.to_csv(video_path, index=False, encoding="utf-8-sig")
+        job, created = refresh_jobs.submit(target_id, x_youtube_api_key, full=full)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
 
-        # 2. Refresh Analytics (Daily Stats)
-        try:
-            df_analytics = fetch_daily_stats(target_id)
-            if not df_analytics.empty:
-                analytics_path = get_cache_path("daily_stats.csv", x_youtube_channel_id)
-                df_analytics.to_csv(analytics_path, index=False, encoding="utf-8-sig")
-                if 'day' in df_analytics.columns:
-                    df_analytics['day'] = df_analytics['day'].astype(str)
-        except Exception as e:
-            logger.error(f"Refresh: Failed to update analytics for {target_id}: {e}")
-        
-        return {"message": f"Successfully refreshed data for {target_id}"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "message": f"Refresh {'queued' if created else 'already in progress'} for {target_id}",
+        **job.to_dict(),
+    }
+
+@app.get("/api/refresh/{job_id}")
+async def get_refresh_status(job_id: str):
+    """Status and progress of a background refresh job."""
+    job = refresh_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Refresh job not found")
+    return job.to_dict()
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters of the in-memory response cache."""
+    return response_cache.stats()
+
+@app.get("/api/quota")
+def get_quota(
+    x_youtube_channel_id: Optional[str] = Header(None),
+    x_youtube_api_key: Optional[str] = Header(None)
+):
+    """Quota units spent and left today (Pacific day) for the caller's API key and channel.
+
+    Keys are reported hashed (``key:<sha256 prefix>``) or as ``oauth:<channel_id>``
+    for the channel's Analytics calls; only the caller's own keys are listed.
+    """
+    keys = []
+    if x_youtube_api_key or API_KEY:
+        keys.append(api_key_id(x_youtube_api_key or API_KEY))
+    if x_youtube_channel_id:
+        keys.append(channel_key_id(x_youtube_channel_id))
+    return quota_usage(keys)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition: route latency, cache, upstream call and cron sync metrics."""
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
 
 @app.get("/api/channel")
-async def get_channel_info(
+def get_channel_info(
     x_youtube_channel_id: Optional[str] = Header(None),
     x_youtube_api_key: Optional[str] = Header(None)
 ):
-    """Returns basic channel info and stats."""
+    """Returns basic channel info and stats.
+
+    Plain ``def`` on purpose: the YouTube call can block (rate limiter, retry
+    backoff, quota ledger write), so FastAPI must run it in the threadpool.
+    """
     channel_id = x_youtube_channel_id
     
     if not channel_id:
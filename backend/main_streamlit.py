@@ -5,6 +5,7 @@ from src.ui.estadisticas import show_time_comparisons
 from src.ui.data_stats import show_daily_stats
 from src.services.fetch_data import fetch_all_videos
 from src.services.fetch_daily import fetch_daily_stats
+from src.services.rollups import update_video_rollups
 from src.core.config import CHANNEL_ID, logger
 
 # ======================
@@ -105,7 +106,9 @@ st.markdown("""
 # ======================
 @st.cache_data
 def get_all_videos(channel_id):
-    return fetch_all_videos(channel_id)
+    # Los rollups se calculan una vez por descarga, no en cada rerun
+    df = fetch_all_videos(channel_id)
+    return df, update_video_rollups(df, channel_id)
 
 @st.cache_data
 def get_daily_stats(channel_id):
@@ -113,7 +116,7 @@ def get_daily_stats(channel_id):
 
 # Carga
 with st.spinner("🚀 Cargando Suite Gamer..."):
-    df = get_all_videos(CHANNEL_ID)
+    df, rollups = get_all_videos(CHANNEL_ID)
     df_daily = get_daily_stats(CHANNEL_ID)
 
 # ======================
@@ -138,10 +141,10 @@ else:
     tab1, tab2, tab3 = st.tabs(["📊 DASHBOARD", "🕒 TIEMPO", "📈 DAILY"])
 
     with tab1:
-        show(df)
+        show(df, rollups)
 
     with tab2:
-        show_time_comparisons(df)
+        show_time_comparisons(df, rollups)
 
     with tab3:
         if df_daily.empty:
@@ -6,11 +6,15 @@ from google_auth_oauthlib.flow import Flow
 from sqlalchemy.orm import Session
 from ...core.database import get_db
 from ...services.auth_service import save_channel_credentials
+from ...services.credential_store import invalidate_credentials
+from ...services.analytics_reports import report_cache
 import os
 from googleapiclient.discovery import build
 from ...core.config import logger
+from ...core.response_cache import response_cache
+from ...core.tracing import ROUTE_CLASS
 
-router = APIRouter()
+router = APIRouter(route_class=ROUTE_CLASS)  # X-Profile also applies to the auth routes
 
 # Allow HTTP for local testing of OAuth (remove in production if using HTTPS)
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
@@ -98,6 +102,9 @@ async def callback(request: Request, db: Session = Depends(get_db)):
         
         # Save to DB
         save_channel_credentials(db, channel_info, credentials)
+        invalidate_credentials(channel_id)  # Drop the cached token/client of the previous grant
+        report_cache.invalidate(channel_id)
+        response_cache.invalidate(channel_id)
         
         # Redirect to Frontend
         # If Frontend is on a different port/domain, we need FRONTEND_URL env var
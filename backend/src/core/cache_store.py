@@ -0,0 +1,138 @@
+"""Caché de DataFrames en ``data/`` con formato de archivo intercambiable.
+
+Formatos soportados (variable CACHE_FORMAT):
+- ``arrow``: Arrow IPC, leído con memory-map (por defecto si pyarrow está instalado).
+- ``parquet``: Parquet columnar comprimido.
+- ``csv``: el formato anterior; se usa si pyarrow no está disponible.
+
+Los formatos columnares conservan los tipos (``Publicado``/``day`` como fechas,
+contadores como enteros). Un CSV antiguo se migra automáticamente al formato
+configurado la primera vez que se lee.
+"""
+import os
+import tempfile
+import pandas as pd
+from src.core.config import logger, DATA_DIR
+from src.core.metrics import cache_reads
+from src.core.tracing import span
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow es opcional
+    pa = None
+
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# Tipos esperados por dataset, aplicados al escribir y al migrar CSV antiguos
+SCHEMAS = {
+    "videos": {"Publicado": "datetime", "Vistas": "int", "Likes": "int", "Comentarios": "int"},
+    "daily_stats": {"day": "date", "views": "int", "likes": "int", "comments": "int", "subscribers": "int"},
+    "rollups_videos": {"period": "date", "views": "int", "likes": "int", "comments": "int", "count": "int"},
+    "rollups_daily": {"period": "date", "views": "int", "likes": "int", "comments": "int", "subscribers": "int", "count": "int"},
+}
+
+def _default_format():
+    if pa is None and not os.getenv("CACHE_FORMAT"):
+        logger.warning("pyarrow no está instalado: la caché usa CSV (sin tipos ni memory-map).")
+    fmt = os.getenv("CACHE_FORMAT", "arrow" if pa else "csv").lower()
+    if fmt not in EXTENSIONS:
+        logger.warning(f"CACHE_FORMAT '{fmt}' no soportado, usando csv.")
+        return "csv"
+    if fmt != "csv" and pa is None:
+        logger.warning(f"CACHE_FORMAT '{fmt}' requiere pyarrow (no instalado), usando csv.")
+        return "csv"
+    return fmt
+
+CACHE_FORMAT = _default_format()
+
+def get_cache_path(name, channel_id=None, fmt=None):
+    """Ruta del archivo de caché ``name`` (sin extensión), con namespace por canal."""
+    filename = f"{name}{EXTENSIONS[fmt or CACHE_FORMAT]}"
+    if channel_id:
+        return os.path.join(DATA_DIR, f"{channel_id}_{filename}")
+    return os.path.join(DATA_DIR, filename)
+
+def apply_schema(df, name):
+    """Normaliza los tipos de las columnas conocidas del dataset ``name``."""
+    df = df.copy()
+    for col, kind in SCHEMAS.get(name, {}).items():
+        if col not in df.columns:
+            continue
+        if kind == "datetime":
+            df[col] = pd.to_datetime(df[col], utc=True, errors="coerce")
+        elif kind == "date":
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif kind == "int":
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int64")
+    return df
+
+def _read(path, fmt):
+    if fmt == "arrow":
+        with pa.memory_map(path, "r") as source:
+            return pa.ipc.open_file(source).read_all().to_pandas()
+    if fmt == "parquet":
+        return pd.read_parquet(path, memory_map=True)
+    return pd.read_csv(path)
+
+def _write(df, path, fmt):
+    if fmt == "arrow":
+        feather.write_feather(df, path, compression="uncompressed")  # sin comprimir para poder hacer memory-map
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+
+def read_cache(name, channel_id=None):
+    """Lee la caché ``name`` del canal o devuelve None si no existe."""
+    path = get_cache_path(name, channel_id)
+    if os.path.exists(path):
+        cache_reads.labels(name, "hit").inc()
+        with span("cache.read", dataset=name):
+            df = _read(path, CACHE_FORMAT)
+        return apply_schema(df, name) if CACHE_FORMAT == "csv" else df
+
+    # Migración automática desde el CSV antiguo
+    legacy_path = get_cache_path(name, channel_id, fmt="csv")
+    if CACHE_FORMAT != "csv" and os.path.exists(legacy_path):
+        df = apply_schema(pd.read_csv(legacy_path), name)
+        write_cache(df, name, channel_id)
+        try:
+            os.remove(legacy_path)
+        except FileNotFoundError:
+            pass  # Otro lector concurrente ya la migró
+        logger.info(f"Caché migrada a {CACHE_FORMAT}: {legacy_path} -> {path}")
+        cache_reads.labels(name, "migrated").inc()
+        return df
+    cache_reads.labels(name, "miss").inc()
+    return None
+
+def write_cache(df, name, channel_id=None):
+    """Guarda ``df`` como caché ``name`` del canal en el formato configurado.
+
+    La escritura es atómica (archivo temporal + rename), así que un lector
+    nunca ve un archivo a medio escribir.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = get_cache_path(name, channel_id)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp_", suffix=EXTENSIONS[CACHE_FORMAT])
+    os.close(fd)
+    try:
+        _write(apply_schema(df, name).reset_index(drop=True), tmp_path, CACHE_FORMAT)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+def cache_mtime(name, channel_id=None):
+    """Epoch de la última escritura de la caché, o None si no existe."""
+    try:
+        return os.path.getmtime(get_cache_path(name, channel_id))
+    except OSError:
+        return None
+
+def cache_exists(name, channel_id=None):
+    """Indica si hay caché (en el formato actual o un CSV pendiente de migrar)."""
+    return os.path.exists(get_cache_path(name, channel_id)) or os.path.exists(get_cache_path(name, channel_id, fmt="csv"))
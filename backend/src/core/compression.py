@@ -0,0 +1,55 @@
+"""Compresión de respuestas (brotli/gzip) con umbral de tamaño.
+
+Las respuestas cacheadas (``CachedPayload``) se comprimen una sola vez por
+versión y codificación; el resto de respuestas grandes las comprime
+GZipMiddleware, que deja pasar las que ya traen ``Content-Encoding``.
+"""
+import gzip
+from src.core.config import logger, COMPRESSION, COMPRESSION_MIN_SIZE, COMPRESSION_LEVEL, BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+def _enabled_encodings():
+    encodings = []
+    for encoding in (part.strip().lower() for part in COMPRESSION.split(",")):
+        if encoding in ("", "off", "none", "identity"):
+            continue
+        if encoding == "br" and brotli is None:
+            logger.warning("COMPRESSION incluye 'br' pero brotli no está instalado; se omite.")
+            continue
+        if encoding not in ("br", "gzip"):
+            logger.warning(f"Codificación '{encoding}' no soportada; se omite.")
+            continue
+        encodings.append(encoding)
+    return encodings
+
+ENCODINGS = _enabled_encodings()  # Por orden de preferencia del servidor
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0: salida determinista para el mismo cuerpo
+    return gzip.compress(body, compresslevel=COMPRESSION_LEVEL, mtime=0)
+
+def negotiate(accept_encoding, size):
+    """Codificación a usar según ``Accept-Encoding`` y el tamaño del cuerpo, o None."""
+    if not accept_encoding or size < COMPRESSION_MIN_SIZE or not ENCODINGS:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
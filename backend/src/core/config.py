@@ -44,6 +44,43 @@ if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
 
 # Configuración de la App
 DATA_DIR = "data"
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "4"))  # Llamadas videos.list simultáneas
+CRON_SYNC_WORKERS = int(os.getenv("CRON_SYNC_WORKERS", "4"))  # Canales sincronizados en paralelo
+SYNC_START_DATE = os.getenv("SYNC_START_DATE", "2022-12-31")  # Inicio del historial de Analytics
+LATE_DATA_DAYS = int(os.getenv("LATE_DATA_DAYS", "3"))  # Días recientes que se vuelven a consultar
+ANALYTICS_TOPUP_INTERVAL = int(os.getenv("ANALYTICS_TOPUP_INTERVAL", "14400"))  # Segundos entre consultas en vivo (4h)
+ANALYTICS_TOPUP_MAX_DAYS = int(os.getenv("ANALYTICS_TOPUP_MAX_DAYS", "30"))  # Días recientes que se piden en vivo; el resto, en segundo plano
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))  # Respuestas en memoria (LRU)
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))  # Segundos de vida de cada respuesta
+REFRESH_WORKERS = int(os.getenv("REFRESH_WORKERS", "2"))  # Refrescos en segundo plano simultáneos
+REFRESH_QUEUE_SIZE = int(os.getenv("REFRESH_QUEUE_SIZE", "16"))  # Refrescos pendientes como máximo
+COMPRESSION = os.getenv("COMPRESSION", "gzip")  # Codificaciones por preferencia ("br,gzip" con brotli instalado; "off" para desactivar)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Bytes mínimos para comprimir
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))  # Nivel gzip (1-9)
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))  # Calidad brotli (0-11)
+YOUTUBE_API_ENDPOINT = os.getenv("YOUTUBE_API_ENDPOINT")  # Otra URL base para la Data API (p. ej. el servidor falso de benchmarks)
+YOUTUBE_ANALYTICS_API_ENDPOINT = os.getenv("YOUTUBE_ANALYTICS_API_ENDPOINT")  # Ídem para Analytics
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "10"))  # Peticiones/segundo por API key o canal OAuth (0 = sin límite)
+API_RATE_BURST = int(os.getenv("API_RATE_BURST", "20"))  # Ráfaga máxima por API key o canal
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "16"))  # Peticiones a Google en vuelo, en todo el proceso
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "5"))  # Reintentos ante errores transitorios (429/5xx/rateLimit)
+API_BACKOFF_BASE = float(os.getenv("API_BACKOFF_BASE", "0.5"))  # Segundos del primer reintento (backoff exponencial con jitter)
+API_BACKOFF_MAX = float(os.getenv("API_BACKOFF_MAX", "32"))  # Espera máxima entre reintentos
+QUOTA_DAILY_BUDGET = int(os.getenv("QUOTA_DAILY_BUDGET", "10000"))  # Unidades de cuota por clave y día del Pacífico (0 = sin límite)
+QUOTA_RESERVE = int(os.getenv("QUOTA_RESERVE", "1000"))  # Por debajo, los refrescos se degradan a sólo estadísticas o se aplazan
+QUOTA_FLUSH_INTERVAL = int(os.getenv("QUOTA_FLUSH_INTERVAL", "30"))  # Segundos máximos entre escrituras del libro de cuota
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))  # Peticiones más lentas se registran con su desglose de spans
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"  # Permite la cabecera X-Profile: 1 (cProfile de una petición)
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")  # Donde se guardan los .prof
+ANALYTICS_CHUNK_DAYS = int(os.getenv("ANALYTICS_CHUNK_DAYS", "90"))  # Días por petición de Analytics en rangos largos
+ANALYTICS_CHUNK_RETRIES = int(os.getenv("ANALYTICS_CHUNK_RETRIES", "2"))  # Reintentos por ventana antes de registrarla como fallida
+ANALYTICS_BATCH = os.getenv("ANALYTICS_BATCH", "1") == "1"  # Agrupar reportes de Analytics en un batch HTTP
+ANALYTICS_REPORT_CONCURRENCY = int(os.getenv("ANALYTICS_REPORT_CONCURRENCY", "4"))  # Reportes en paralelo si no hay batch
+ANALYTICS_REPORT_TTL = int(os.getenv("ANALYTICS_REPORT_TTL", "3600"))  # Segundos de vida de cada reporte cacheado
+TOKEN_REFRESH_WINDOW = int(os.getenv("TOKEN_REFRESH_WINDOW", "900"))  # Refrescar tokens que caducan en menos de N segundos
+TOKEN_REFRESH_INTERVAL = int(os.getenv("TOKEN_REFRESH_INTERVAL", "300"))  # Segundos entre revisiones (0 = desactivado)
+TOKEN_REFRESH_WORKERS = int(os.getenv("TOKEN_REFRESH_WORKERS", "4"))  # Refrescos OAuth en paralelo
+TOKEN_REFRESH_BACKOFF_MAX = int(os.getenv("TOKEN_REFRESH_BACKOFF_MAX", "21600"))  # Espera máxima (s) entre reintentos de un refresco fallido
 OS_MAKES_DIRS = True  # Para control interno si es necesario
 
 # Crear directorio de datos si no existe
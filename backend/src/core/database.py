@@ -3,6 +3,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from src.core.tracing import instrument_engine
 
 load_dotenv()
 
@@ -16,10 +17,30 @@ connect_args = {"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_U
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args=connect_args
 )
+instrument_engine(engine)  # db.query spans for traced requests
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Dialects whose insert() supports ON CONFLICT (daily metrics upsert, quota ledger)
+UPSERT_DIALECTS = ("postgresql", "sqlite")
+
+def check_dialect(bind=engine):
+    """Fails fast at startup if DATABASE_URL points to a database without ON CONFLICT upserts."""
+    dialect = bind.dialect.name
+    if dialect not in UPSERT_DIALECTS:
+        raise RuntimeError(f"Unsupported DATABASE_URL dialect '{dialect}': "
+                           f"use one of {', '.join(UPSERT_DIALECTS)}")
+
+def dialect_insert(bind):
+    """Returns the dialect-specific insert() that supports ON CONFLICT for ``bind`` (engine or connection)."""
+    check_dialect(bind)
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
 def get_db():
     db = SessionLocal()
     try:
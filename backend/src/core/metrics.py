@@ -0,0 +1,211 @@
+"""Métricas en memoria con salida en formato de texto de Prometheus.
+
+Registro mínimo propio (sin dependencias): contadores, gauges e histogramas
+con etiquetas. Registrar una observación es una búsqueda en un dict, un
+``bisect`` y una suma bajo un lock; los buckets acumulados y el texto sólo se
+calculan cuando se pide ``/metrics``. Los valores que ya se cuentan en otro
+sitio (p. ej. aciertos de ResponseCache) se exponen con ``collector`` al
+hacer el scrape, sin coste en el camino caliente.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values):
+        """Serie de las etiquetas ``values`` (en el orden de ``labelnames``)."""
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.samples(self.name, _labels(self.labelnames, values), self.labelnames, values))
+        return lines
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self, name, labels, labelnames, values):
+        return [f"{name}{labels} {_number(self.value)}"]
+
+class Counter(_Metric):
+    kind = "counter"
+    _child = _Value
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _child = _Value
+
+    def set(self, value):
+        self._default.set(value)
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # El último es +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name, labels, labelnames, values):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.bounds, float("inf")), counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(labelnames, values, [('le', _number(bound))])} {cumulative}")
+        lines.append(f"{name}_sum{labels} {_number(total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, func):
+        """Registra ``func()`` -> iterable de métricas ya rellenas, calculadas en cada scrape."""
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        """Texto de exposición de Prometheus (versión 0.0.4)."""
+        metrics = list(self._metrics.values())
+        for collect in self._collectors:
+            metrics.extend(collect())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# Métricas de la aplicación (se registran aquí para que el nombre sea único)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "API request latency by route template.", ("method", "route", "status"))
+cache_reads = registry.counter(
+    "cache_store_reads_total", "Reads of the on-disk DataFrame cache by dataset and result.", ("dataset", "result"))
+upstream_calls = registry.counter(
+    "youtube_api_calls_total", "Google API call attempts by method and outcome.", ("method", "status"))
+upstream_duration = registry.histogram(
+    "youtube_api_call_duration_seconds", "Google API call latency by method and status.", ("method", "status"))
+# Las métricas del cron (otro proceso) se leen de su resumen en disco: ver services/cron_status.py
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide cada petición HTTP por plantilla de ruta.
+
+    Se usa la ruta resuelta por el router (``/api/refresh/{job_id}``, no la URL)
+    para que el número de series no crezca con los parámetros; las peticiones
+    que no casan con ninguna ruta se agrupan como ``unmatched``.
+    """
+
+    def __init__(self, app, histogram=http_request_duration, clock=time.perf_counter):
+        self.app = app
+        self.histogram = histogram
+        self.clock = clock
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = self.clock()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            self.histogram.labels(scope["method"], template, status).observe(self.clock() - started)
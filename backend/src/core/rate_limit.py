@@ -0,0 +1,53 @@
+"""Limitador de peticiones por clave (token bucket) compartido entre hilos.
+
+Cada clave (una API key o un canal OAuth) tiene su propio cubo que se rellena
+a ``rate`` peticiones por segundo hasta ``burst``. ``acquire`` bloquea al
+hilo que llama sólo el tiempo necesario para que haya un token disponible.
+"""
+import threading
+import time
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Espera hasta poder consumir ``tokens``. Devuelve los segundos esperados."""
+        if self.rate <= 0:
+            return 0.0
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class RateLimiter:
+    """Registro de cubos, uno por clave, creados bajo demanda."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def acquire(self, key, tokens=1):
+        return self.bucket(key).acquire(tokens)
@@ -0,0 +1,115 @@
+"""Caché en memoria (LRU acotado + TTL por entrada) para respuestas de la API.
+
+Las claves son tuplas ``(endpoint, channel_id, params)`` y los valores las
+respuestas ya serializadas, de modo que una recarga repetida del dashboard no
+vuelve a leer disco ni a serializar JSON.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from src.core.config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+from src.core.compression import compress
+from src.core.metrics import registry, Counter, Gauge
+
+class CachedPayload:
+    """Cuerpo JSON ya serializado junto con sus validadores HTTP."""
+    __slots__ = ("body", "etag", "last_modified", "headers", "_encoded")
+
+    def __init__(self, body, last_modified=None, headers=None):
+        self.body = body
+        # ETag fuerte: hash del contenido exacto que se envía
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.last_modified = last_modified  # epoch (segundos) de la última sincronización
+        self.headers = headers or {}  # Cabeceras extra (p. ej. paginación)
+        self._encoded = {}  # encoding -> cuerpo comprimido (se calcula una vez por versión)
+
+    def encoded(self, encoding):
+        """Cuerpo comprimido con ``encoding``; sólo se comprime en la primera petición."""
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def etag_for(self, encoding=None):
+        """ETag de la representación enviada (cada codificación tiene la suya)."""
+        return self.etag if encoding is None else self.etag[:-1] + f'-{encoding}"'
+
+_caches = []  # Instancias con nombre, expuestas en /metrics
+
+class ResponseCache:
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, name=None):
+        self.name = name
+        if name:
+            _caches.append(self)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Devuelve el valor cacheado o None si no existe o ha caducado."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, channel_id=None):
+        """Borra las entradas de un canal (o todas). Devuelve cuántas se borraron."""
+        with self._lock:
+            if channel_id is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [key for key in self._entries if key[1] == channel_id]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+@registry.collector
+def _collect_cache_metrics():
+    """Contadores de las cachés en memoria, leídos al hacer el scrape."""
+    lookups = Counter("response_cache_lookups_total", "In-memory cache lookups by cache and result.", ("cache", "result"))
+    evictions = Counter("response_cache_evictions_total", "LRU evictions by cache.", ("cache",))
+    entries = Gauge("response_cache_entries", "Entries currently held by cache.", ("cache",))
+    for cache in _caches:
+        stats = cache.stats()
+        lookups.labels(cache.name, "hit").inc(stats["hits"])
+        lookups.labels(cache.name, "miss").inc(stats["misses"])
+        evictions.labels(cache.name).inc(stats["evictions"])
+        entries.labels(cache.name).set(stats["entries"])
+    return [lookups, evictions, entries]
+
+response_cache = ResponseCache(name="responses")
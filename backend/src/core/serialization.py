@@ -0,0 +1,51 @@
+"""Serialización rápida de DataFrames y registros a bytes JSON.
+
+Usa orjson si está instalado y, si no, el ``to_json`` vectorizado de pandas.
+El esquema es el mismo que devolvía FastAPI con ``df.to_dict(orient="records")``:
+una lista de objetos, fechas como cadenas ISO y NaN como ``null``.
+"""
+import json
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+def _format_dates(df):
+    """Columnas de fecha tipadas -> las cadenas ISO que espera la UI.
+
+    Fechas con zona (``Publicado``) -> ``2024-01-31T18:00:00Z``; sin zona
+    (``day``) -> ``2024-01-31``. Se formatea con numpy (mucho más rápido que
+    ``dt.strftime``) y NaT se convierte en None.
+    """
+    date_cols = df.select_dtypes(include=["datetimetz", "datetime"]).columns
+    if not len(date_cols):
+        return df
+    df = df.copy()
+    for col in date_cols:
+        series = df[col]
+        if getattr(series.dtype, "tz", None) is not None:
+            values = np.char.add(series.dt.tz_convert(None).values.astype("datetime64[s]").astype(str), "Z")
+        else:
+            values = series.values.astype("datetime64[D]").astype(str)
+        formatted = pd.Series(values, index=df.index, dtype=object)
+        formatted[series.isna()] = None
+        df[col] = formatted
+    return df
+
+def frame_to_json(df) -> bytes:
+    """DataFrame -> bytes JSON en formato ``records``, sin pasar por jsonable_encoder."""
+    df = _format_dates(df)
+    if orjson is not None:
+        columns = [str(col) for col in df.columns]
+        values = [df[col].tolist() for col in df.columns]  # Tipos nativos de Python, por columna
+        return orjson.dumps([dict(zip(columns, row)) for row in zip(*values)])
+    return df.to_json(orient="records", force_ascii=False).encode("utf-8")
+
+def dumps(content) -> bytes:
+    """Serializa dicts/listas ya construidos (mismo formato compacto que JSONResponse)."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,256 @@
+"""Trazas ligeras en proceso: spans por petición y log de peticiones lentas.
+
+``TracingMiddleware`` abre una traza por petición HTTP (con su request id,
+tomado de ``X-Request-ID`` o generado) en una ``ContextVar``. El código
+instrumentado (lecturas de caché, consultas SQL, carga de credenciales,
+llamadas a Google) abre ``span(nombre)``: si no hay traza activa no hace nada
+más que leer la ContextVar. Las tareas que se mandan a un pool de hilos se
+envuelven con ``bind`` para que sus spans caigan en la traza de la petición.
+
+Si la petición supera SLOW_REQUEST_MS se escribe una línea JSON con el
+desglose por span. Con PROFILE_REQUESTS=1, la cabecera ``X-Profile: 1``
+ejecuta el endpoint de esa petición bajo cProfile y guarda el ``.prof`` en
+PROFILE_DIR (se abre con ``python -m pstats`` o snakeviz).
+"""
+import contextvars
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from fastapi.routing import APIRoute
+from src.core.config import SLOW_REQUEST_MS, PROFILE_REQUESTS, PROFILE_DIR
+
+MAX_SPANS = 500      # Spans detallados que se guardan por traza (el desglose los cuenta todos)
+TIMELINE_SPANS = 50  # Spans detallados que se escriben en el log de peticiones lentas
+REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")  # Va en nombres de archivo (.prof): nada de rutas
+
+# Una línea JSON por petición lenta, sin el prefijo del formato de logging general
+slow_log = logging.getLogger("youtube_dashboard.slow")
+if not slow_log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_log.addHandler(_handler)
+    slow_log.propagate = False
+
+_current = contextvars.ContextVar("trace", default=None)
+
+class Trace:
+    def __init__(self, request_id, profile=False):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans = []     # (nombre, inicio relativo, duración, atributos)
+        self.totals = {}    # nombre -> [número, segundos]
+        self.profile = profile
+        self.profile_path = None
+        self._lock = threading.Lock()
+
+    def record(self, name, started, duration, attrs=None):
+        with self._lock:
+            total = self.totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += duration
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append((name, started - self.started, duration, attrs))
+
+    def breakdown(self):
+        """{nombre: {"count", "ms"}} ordenado por tiempo total."""
+        with self._lock:
+            items = sorted(self.totals.items(), key=lambda item: -item[1][1])
+        return {name: {"count": count, "ms": round(seconds * 1000, 2)} for name, (count, seconds) in items}
+
+    def timeline(self, limit=TIMELINE_SPANS):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: -span[2])[:limit]
+        return [
+            {"span": name, "at_ms": round(offset * 1000, 2), "ms": round(duration * 1000, 2), **(attrs or {})}
+            for name, offset, duration, attrs in sorted(spans, key=lambda span: span[1])
+        ]
+
+class _Span:
+    __slots__ = ("trace", "name", "attrs", "started")
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        attrs = self.attrs
+        if exc_type is not None:
+            attrs = {**(attrs or {}), "error": exc_type.__name__}
+        self.trace.record(self.name, self.started, time.perf_counter() - self.started, attrs)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(name, **attrs):
+    """Context manager que mide un bloque dentro de la traza actual (si la hay)."""
+    trace = _current.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name, attrs or None)
+
+def record_span(name, started, duration, **attrs):
+    """Registra un span medido por fuera (p. ej. eventos de SQLAlchemy)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.record(name, started, duration, attrs or None)
+
+def bind(func):
+    """``func`` ligada al contexto actual, para ejecutarla en otro hilo sin perder la traza."""
+    if _current.get() is None:
+        return func
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        # Una copia por llamada: un mismo Context no puede estar activo en dos hilos
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+def instrument_engine(engine):
+    """Mide cada sentencia SQL del ``engine`` como span ``db.query``."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("trace_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("trace_started")
+        if stack and _current.get() is not None:
+            started = stack.pop()
+            record_span("db.query", started, time.perf_counter() - started, sql=statement.split(None, 1)[0].upper())
+
+def _run_profiled(trace, call):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return call()
+    finally:
+        profiler.disable()
+        _save_profile(trace, profiler)
+
+def _save_profile(trace, profiler):
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        trace.profile_path = os.path.join(PROFILE_DIR, f"{trace.request_id}.prof")
+        profiler.dump_stats(trace.profile_path)
+    except OSError as e:
+        slow_log.warning(f"Could not save profile for {trace.request_id}: {e}")
+
+def profiled(endpoint):
+    """Envuelve un endpoint para ejecutarlo bajo cProfile si su petición lo pidió.
+
+    El profiler se activa en el hilo que ejecuta el endpoint (los endpoints
+    síncronos corren en el threadpool, no en el del event loop). En endpoints
+    async también cuenta lo que otras corrutinas hagan mientras éste espera.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None or not trace.profile:
+                return await endpoint(*args, **kwargs)
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profiler.disable()
+                _save_profile(trace, profiler)  # No se puede reutilizar _run_profiled con await
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None or not trace.profile:
+                return endpoint(*args, **kwargs)
+            return _run_profiled(trace, lambda: endpoint(*args, **kwargs))
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """Ruta que ejecuta su endpoint bajo cProfile si la petición envió ``X-Profile: 1``."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+# Clase de ruta para la app y cada APIRouter: los routers incluidos conservan la suya
+ROUTE_CLASS = ProfiledRoute if PROFILE_REQUESTS else APIRoute
+
+class TracingMiddleware:
+    """Middleware ASGI: request id, traza por petición y log JSON de peticiones lentas."""
+
+    def __init__(self, app, slow_ms=SLOW_REQUEST_MS, allow_profile=PROFILE_REQUESTS):
+        self.app = app
+        self.slow_ms = slow_ms
+        self.allow_profile = allow_profile
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or ())
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")
+        if not REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex[:16]
+        profile = self.allow_profile and headers.get(b"x-profile", b"") in (b"1", b"true")
+        trace = Trace(request_id, profile=profile)
+        token = _current.set(trace)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                extra = [(b"x-request-id", request_id.encode("latin-1"))]
+                if trace.profile:
+                    extra.append((b"x-profile-id", request_id.encode("latin-1")))
+                message = {**message, "headers": [*message.get("headers", []), *extra]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            elapsed_ms = (time.perf_counter() - trace.started) * 1000
+            if elapsed_ms >= self.slow_ms or trace.profile_path:
+                self._log(scope, trace, status, elapsed_ms)
+
+    def _log(self, scope, trace, status, elapsed_ms):
+        route = scope.get("route")
+        entry = {
+            "ts": time.time(),
+            "event": "slow_request" if elapsed_ms >= self.slow_ms else "profiled_request",
+            "request_id": trace.request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", None),
+            "status": status,
+            "duration_ms": round(elapsed_ms, 2),
+            "spans": trace.breakdown(),
+            "timeline": trace.timeline(),
+        }
+        if trace.profile_path:
+            entry["profile"] = trace.profile_path
+        slow_log.warning(json.dumps(entry, default=str))
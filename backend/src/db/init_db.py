@@ -1,9 +1,51 @@
-from ..core.database import engine, Base
+from sqlalchemy import func, inspect, select, text
+from ..core.database import engine, Base, check_dialect
 from . import models
 
+def upgrade_schema(bind=engine):
+    """Applies additive schema changes that create_all() skips on existing tables."""
+    # Nullable columns added after the table was first created (e.g. channels.token_expiry)
+    for table in (models.Channel.__table__,):
+        existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            try:
+                with bind.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(bind.dialect)}"))
+            except Exception as e:
+                print(f"WARNING: Could not add column {table.name}.{column.name}: {e}")
+
+    # Indexes declared after the table was first created (e.g. the unique
+    # (channel_id_fk, date) index used by the daily metrics bulk upsert).
+    table = models.DailyMetric.__table__
+    existing = {index["name"] for index in inspect(bind).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        if index.unique:
+            removed = dedupe_rows(bind, table, [column.name for column in index.columns])
+            if removed:
+                print(f"WARNING: Removed {removed} duplicate rows from {table.name} before creating {index.name}")
+        try:
+            index.create(bind=bind, checkfirst=True)
+        except Exception as e:
+            if index.unique:
+                # Without it every ON CONFLICT upsert fails: stop here instead of at runtime
+                raise RuntimeError(f"Could not create unique index {index.name}: {e}") from e
+            print(f"WARNING: Could not create index {index.name}: {e}")
+
+def dedupe_rows(bind, table, columns):
+    """Deletes rows that repeat ``columns``, keeping the newest (highest id). Returns how many were removed."""
+    keep = select(func.max(table.c.id)).group_by(*(table.c[name] for name in columns))
+    with bind.begin() as conn:
+        return conn.execute(table.delete().where(table.c.id.not_in(keep))).rowcount
+
 def init_db():
+    check_dialect(engine)
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
     print("Database initialized successfully.")
 
 if __name__ == "__main__":
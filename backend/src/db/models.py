@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, BigInteger
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, BigInteger, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
@@ -14,6 +14,11 @@ class Channel(Base):
     # Encrypted tokens using Fernet
     access_token_enc = Column(String, nullable=True)
     refresh_token_enc = Column(String, nullable=True)
+    token_expiry = Column(DateTime, nullable=True)  # Access token expiry (naive UTC, as google-auth uses)
+    # Background token refresh failures: backoff for transient errors, parked after invalid_grant
+    token_refresh_failures = Column(Integer, nullable=True)      # Consecutive failed refreshes
+    token_refresh_retry_at = Column(DateTime, nullable=True)     # Next background attempt (naive UTC)
+    refresh_token_revoked = Column(Boolean, nullable=True)       # True until the channel re-authorizes
     
     email = Column(String, nullable=True)
     last_updated = Column(DateTime(timezone=True), onupdate=func.now())
@@ -24,6 +29,11 @@ class Channel(Base):
 
 class DailyMetric(Base):
     __tablename__ = "daily_metrics"
+    __table_args__ = (
+        # One row per channel per date (same as unique_channel_date in schema.sql).
+        # Required by the INSERT ... ON CONFLICT bulk upsert.
+        Index("uq_daily_metrics_channel_date", "channel_id_fk", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     channel_id_fk = Column(Integer, ForeignKey("channels.id"), nullable=False)
@@ -37,3 +47,19 @@ class DailyMetric(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     channel = relationship("Channel", back_populates="metrics")
+
+class QuotaUsage(Base):
+    __tablename__ = "quota_usage"
+    __table_args__ = (
+        # One row per key per Pacific day; charged with INSERT ... ON CONFLICT.
+        Index("uq_quota_usage_key_day", "key", "day", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False)  # "key:<sha256 prefix>" or "oauth:<channel_id>", never the raw API key
+    day = Column(Date, nullable=False)    # Quota day (America/Los_Angeles), when Google resets the counters
+
+    units = Column(BigInteger, nullable=False, default=0)
+    calls = Column(BigInteger, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
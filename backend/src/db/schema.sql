@@ -7,6 +7,9 @@ create table public.channels (
   access_token text, -- Encrypted or plain (secured by RLS)
   refresh_token text,
   token_expiry timestamp with time zone,
+  token_refresh_failures integer,
+  token_refresh_retry_at timestamp,
+  refresh_token_revoked boolean,
   email text,
   created_at timestamp with time zone default timezone('utc'::text, now()) not null,
   last_updated timestamp with time zone
@@ -27,9 +30,23 @@ create table public.daily_metrics (
   constraint unique_channel_date unique (channel_id, date)
 );
 
+-- Create Quota Usage Table (YouTube API units per key per Pacific day)
+create table public.quota_usage (
+  id bigint generated by default as identity primary key,
+  key text not null, -- "key:<sha256 prefix>" or "oauth:<channel_id>", never the raw API key
+  day date not null,
+  units bigint not null default 0,
+  calls bigint not null default 0,
+  updated_at timestamp with time zone default timezone('utc'::text, now()),
+
+  -- One row per key per day; charged with INSERT ... ON CONFLICT
+  constraint uq_quota_usage_key_day unique (key, day)
+);
+
 -- Enable Row Level Security (RLS)
 alter table public.channels enable row level security;
 alter table public.daily_metrics enable row level security;
+alter table public.quota_usage enable row level security;
 
 -- Create Policies (Simple for now: Service Role has full access)
 -- In a real app, you'd add policies for authenticated users to see ONLY their own data.
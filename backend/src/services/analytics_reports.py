@@ -0,0 +1,168 @@
+"""Reportes de YouTube Analytics agrupados por canal.
+
+Varias definiciones de reporte (diario, por video, fuentes de tráfico,
+países...) del mismo canal se piden en un único batch HTTP, de modo que un
+dashboard con N reportes cuesta la latencia de una sola ida y vuelta. Si el
+batch no está disponible (o falla entero) se lanzan en paralelo con un pool
+acotado.
+
+Cada resultado se convierte en un DataFrame tipado (según ``columnHeaders``)
+y se cachea en memoria por (canal, reporte, rango de fechas).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import pandas as pd
+from src.core.config import logger, SYNC_START_DATE, ANALYTICS_BATCH, ANALYTICS_REPORT_CONCURRENCY, ANALYTICS_REPORT_TTL
+from src.core.response_cache import ResponseCache
+from src.core.tracing import bind
+from src.services.api_youtube_analytics import get_youtube_analytics_service
+from src.services.youtube_clients import execute, execute_batch, new_batch, YouTubeAPIError
+
+class ReportSpec:
+    """Definición de un reporte de ``reports().query``."""
+
+    def __init__(self, name, metrics, dimensions, sort=None, filters=None, max_results=None, rename=None):
+        self.name = name
+        self.metrics = metrics
+        self.dimensions = dimensions
+        self.sort = sort
+        self.filters = filters
+        self.max_results = max_results
+        self.rename = rename or {}
+
+    def query_kwargs(self, channel_id, start_date, end_date):
+        kwargs = {
+            "ids": f"channel=={channel_id}",
+            "startDate": start_date,
+            "endDate": end_date,
+            "metrics": self.metrics,
+            "dimensions": self.dimensions,
+        }
+        if self.sort:
+            kwargs["sort"] = self.sort
+        if self.filters:
+            kwargs["filters"] = self.filters
+        if self.max_results:
+            kwargs["maxResults"] = self.max_results
+        return kwargs
+
+REPORTS = {
+    spec.name: spec for spec in (
+        ReportSpec("daily", "views,likes,comments,subscribersGained", "day", sort="day",
+                   rename={"subscribersGained": "subscribers"}),
+        ReportSpec("videos", "views,estimatedMinutesWatched,averageViewDuration,likes,comments", "video",
+                   sort="-views", max_results=200),
+        ReportSpec("traffic_sources", "views,estimatedMinutesWatched", "insightTrafficSourceType", sort="-views"),
+        ReportSpec("countries", "views,estimatedMinutesWatched", "country", sort="-views"),
+        ReportSpec("devices", "views,estimatedMinutesWatched", "deviceType", sort="-views"),
+    )
+}
+
+DATE_DIMENSIONS = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+DATA_TYPES = {"INTEGER": "int64", "FLOAT": "float64", "CURRENCY": "float64"}
+
+_batch_supported = True  # Se desactiva si el endpoint de batch responde que no existe
+
+report_cache = ResponseCache(ttl=ANALYTICS_REPORT_TTL, name="analytics_reports")  # (report:<name>, channel_id, (start, end)) -> DataFrame
+
+def report_frame(response, spec=None):
+    """Respuesta de ``reports().query`` -> DataFrame con los tipos de ``columnHeaders``."""
+    headers = response.get("columnHeaders", [])
+    columns = [h["name"] for h in headers]
+    df = pd.DataFrame(response.get("rows") or [], columns=columns)
+    for header in headers:
+        name = header["name"]
+        if name in DATE_DIMENSIONS:
+            df[name] = pd.to_datetime(df[name], format=DATE_DIMENSIONS[name])
+        elif header.get("dataType") in DATA_TYPES:
+            df[name] = pd.to_numeric(df[name], errors="coerce").fillna(0).astype(DATA_TYPES[header["dataType"]])
+        else:
+            df[name] = df[name].astype("string")
+    if spec is not None and spec.rename:
+        df = df.rename(columns=spec.rename)
+    return df
+
+def _cache_key(channel_id, name, start_date, end_date):
+    return (f"report:{name}", channel_id, (start_date, end_date))
+
+def _run_batch(service, requests):
+    """Un único batch HTTP. Devuelve {nombre: respuesta | excepción}."""
+    results = {}
+
+    def callback(request_id, response, exception):
+        results[request_id] = exception if exception is not None else response
+
+    batch = new_batch(service, "youtubeAnalytics", callback)
+    for name, request in requests.items():
+        batch.add(request, request_id=name)
+    execute_batch(batch, list(requests.values()))
+    return results
+
+def _run_concurrent(requests, workers):
+    """Peticiones en paralelo, cada una con la conexión de su hilo."""
+    def run(item):
+        name, request = item
+        try:
+            return name, execute(request)
+        except Exception as e:
+            return name, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(requests))), thread_name_prefix="analytics") as pool:
+        return dict(pool.map(bind(run), requests.items()))
+
+def fetch_reports(channel_id, reports=("daily",), start_date=None, end_date=None,
+                  use_batch=ANALYTICS_BATCH, workers=ANALYTICS_REPORT_CONCURRENCY):
+    """
+    Pide varios reportes de un canal a la vez y devuelve ``{nombre: DataFrame}``.
+
+    Los reportes ya cacheados para el mismo rango no se vuelven a pedir. Un
+    reporte que falla se devuelve como DataFrame vacío (y no se cachea).
+    """
+    unknown = [name for name in reports if name not in REPORTS]
+    if unknown:
+        raise ValueError(f"Unknown Analytics reports: {', '.join(unknown)}")
+
+    end_date = end_date or (date.today() - timedelta(days=1)).isoformat()
+    start_date = start_date or SYNC_START_DATE
+
+    frames, missing = {}, []
+    for name in reports:
+        cached = report_cache.get(_cache_key(channel_id, name, start_date, end_date))
+        if cached is not None:
+            frames[name] = cached
+        else:
+            missing.append(name)
+    if not missing:
+        return frames
+
+    service = get_youtube_analytics_service(channel_id)
+    if not service:
+        logger.warning(f"No hay servicio de Analytics disponible para {channel_id} (Falta Token).")
+        return {**frames, **{name: pd.DataFrame() for name in missing}}
+
+    requests = {
+        name: service.reports().query(**REPORTS[name].query_kwargs(channel_id, start_date, end_date))
+        for name in missing
+    }
+    global _batch_supported
+    results = None
+    if use_batch and _batch_supported and len(requests) > 1:
+        try:
+            results = _run_batch(service, requests)
+        except YouTubeAPIError as e:
+            if e.status in (400, 404, 501):
+                _batch_supported = False  # No se vuelve a intentar en este proceso
+            logger.warning(f"Batch de Analytics no disponible ({e}); se piden los reportes en paralelo.")
+    if results is None:
+        results = _run_concurrent(requests, workers)
+
+    for name in missing:
+        result = results.get(name)
+        if result is None or isinstance(result, Exception):
+            logger.error(f"Error en el reporte '{name}' de Analytics para {channel_id}: {result}")
+            frames[name] = pd.DataFrame()
+            continue
+        frames[name] = report_frame(result, REPORTS[name])
+        report_cache.set(_cache_key(channel_id, name, start_date, end_date), frames[name])
+    logger.info(f"Reportes de Analytics para {channel_id}: {', '.join(f'{n}={len(frames[n])}' for n in missing)}")
+    return frames
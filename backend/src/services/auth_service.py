@@ -3,9 +3,15 @@ from ..db.models import Channel
 from ..core.security import encrypt_token, decrypt_token
 from google.oauth2.credentials import Credentials
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 
+def _naive_utc(value):
+    """google-auth compares expiry against a naive UTC datetime."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 def get_channel_by_id(db: Session, channel_id: str):
     return db.query(Channel).filter(Channel.channel_id == channel_id).first()
 
@@ -31,6 +37,10 @@ def save_channel_credentials(db: Session, channel_info: dict, credentials):
         if refresh_token_enc:
             db_channel.refresh_token_enc = refresh_token_enc
         db_channel.token_expiry = credentials.expiry
+        # A new grant: the background refresher may try this channel again
+        db_channel.token_refresh_failures = None
+        db_channel.token_refresh_retry_at = None
+        db_channel.refresh_token_revoked = None
         db_channel.last_updated = datetime.utcnow()
     else:
         # Create new
@@ -40,6 +50,7 @@ def save_channel_credentials(db: Session, channel_info: dict, credentials):
             thumbnail_url=channel_info.get("snippet", {}).get("thumbnails", {}).get("default", {}).get("url"),
             access_token_enc=access_token_enc,
             refresh_token_enc=refresh_token_enc,
+            token_expiry=credentials.expiry,
             created_at=datetime.utcnow()
         )
         db.add(db_channel)
@@ -53,6 +64,26 @@ def save_channel_credentials(db: Session, channel_info: dict, credentials):
     db.refresh(db_channel)
     return db_channel
 
+def update_channel_token(db: Session, channel_id: str, credentials):
+    """
+    Stores a refreshed access token (and a rotated refresh token, if any) for a channel.
+    """
+    values = {
+        "access_token_enc": encrypt_token(credentials.token),
+        "token_expiry": credentials.expiry,
+        # Keep last_updated: it tracks data syncs (Last-Modified), not token refreshes
+        "last_updated": Channel.last_updated,
+        "token_refresh_failures": None,
+        "token_refresh_retry_at": None,
+        "refresh_token_revoked": None,
+    }
+    if credentials.refresh_token:
+        values["refresh_token_enc"] = encrypt_token(credentials.refresh_token)
+
+    updated = db.query(Channel).filter(Channel.channel_id == channel_id).update(values, synchronize_session=False)
+    db.commit()
+    return bool(updated)
+
 def get_credentials_from_db(db: Session, channel_id: str):
     """
     Retrieves decrypted credentials from the database.
@@ -78,5 +109,6 @@ def get_credentials_from_db(db: Session, channel_id: str):
         "token_uri": "https://oauth2.googleapis.com/token",
         "client_id": os.getenv("GOOGLE_CLIENT_ID"),
         "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
+        "expiry": _naive_utc(channel.token_expiry),
         "scopes": ["https://www.googleapis.com/auth/youtube.readonly", "https://www.googleapis.com/auth/yt-analytics.readonly"]
     }
@@ -0,0 +1,115 @@
+"""Caché en memoria de credenciales OAuth por canal.
+
+Las credenciales se leen de la BD (y se descifran) una sola vez por canal y se
+reutilizan mientras el token de acceso siga vigente. Cuando está a punto de
+caducar se refresca una sola vez (un lock por canal evita refrescos
+simultáneos) y el token nuevo se guarda en la BD con ``update_channel_token``.
+"""
+import threading
+from datetime import datetime, timedelta
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+from src.core.config import logger
+from src.core.tracing import span
+from src.core.database import SessionLocal
+from src.services.auth_service import get_credentials_from_db, update_channel_token
+from src.services.youtube_clients import drop_service
+
+_lock = threading.Lock()
+_credentials = {}    # channel_id -> Credentials
+_channel_locks = {}  # channel_id -> Lock (serializa carga y refresco)
+
+def _channel_lock(channel_id):
+    with _lock:
+        return _channel_locks.setdefault(channel_id, threading.Lock())
+
+def _load(channel_id):
+    with SessionLocal() as db:
+        creds_data = get_credentials_from_db(db, channel_id)
+    if not creds_data:
+        return None
+    logger.info(f"Loaded credentials for {channel_id}. "
+                f"Has Refresh Token: {bool(creds_data.get('refresh_token'))}, "
+                f"Has Client ID: {bool(creds_data.get('client_id'))}, "
+                f"Has Client Secret: {bool(creds_data.get('client_secret'))}")
+    return Credentials(
+        token=creds_data["token"],
+        refresh_token=creds_data.get("refresh_token"),
+        token_uri=creds_data.get("token_uri"),
+        client_id=creds_data.get("client_id"),
+        client_secret=creds_data.get("client_secret"),
+        scopes=creds_data.get("scopes"),
+        expiry=creds_data.get("expiry"),
+    )
+
+def _needs_refresh(creds):
+    # Sin fecha de caducidad (tokens guardados antes de registrarla) no se puede
+    # saber si sigue vigente: se refresca una vez para conocerla
+    return creds.expiry is None or creds.expired
+
+def refresh_credentials(channel_id, creds):
+    """Refresca ``creds`` y guarda el token nuevo en la BD. Devuelve True si se refrescó."""
+    creds.refresh(Request())
+    with SessionLocal() as db:
+        update_channel_token(db, channel_id, creds)
+    logger.info(f"Refreshed access token for {channel_id} (expires {creds.expiry} UTC)")
+    return True
+
+def get_channel_credentials(channel_id):
+    """Credenciales vigentes del canal (de la caché o de la BD), o None si no hay."""
+    creds = _credentials.get(channel_id)
+    if creds is not None and not _needs_refresh(creds):
+        return creds
+
+    with _channel_lock(channel_id):
+        creds = _credentials.get(channel_id)  # Otro hilo pudo cargarlas o refrescarlas
+        if creds is None:
+            try:
+                with span("credentials.load"):  # Consulta + descifrado Fernet
+                    creds = _load(channel_id)
+            except Exception as e:
+                logger.error(f"Error recuperando credenciales de BD para {channel_id}: {e}")
+                return None
+            if creds is None:
+                return None
+
+        if _needs_refresh(creds):
+            if not creds.refresh_token:
+                if creds.expired:
+                    _credentials.pop(channel_id, None)
+                    return None
+            else:
+                try:
+                    with span("credentials.refresh"):
+                        refresh_credentials(channel_id, creds)
+                except Exception as e:
+                    logger.error(f"Error al refrescar el token: {e}")
+                    _credentials.pop(channel_id, None)
+                    return None
+
+        _credentials[channel_id] = creds
+        return creds
+
+def refresh_channel_credentials(channel_id, window=0):
+    """
+    Refresca el token del canal si caduca en menos de ``window`` segundos.
+
+    Lo usa el refresco proactivo (token_refresher) para que las peticiones de
+    usuario no tengan que esperar a Google. Devuelve True si se refrescó.
+    """
+    with _channel_lock(channel_id):
+        creds = _credentials.get(channel_id) or _load(channel_id)
+        if creds is None or not creds.refresh_token:
+            return False
+        if creds.expiry is not None and creds.expiry - datetime.utcnow() > timedelta(seconds=window):
+            _credentials[channel_id] = creds  # Ya vigente (p. ej. lo refrescó otro proceso)
+            return False
+        refresh_credentials(channel_id, creds)
+        _credentials[channel_id] = creds
+        return True
+
+def invalidate_credentials(channel_id):
+    """Olvida las credenciales y el cliente de Analytics del canal (p. ej. tras re-autorizar)."""
+    with _lock:
+        _credentials.pop(channel_id, None)
+    drop_service("youtubeAnalytics", "v2", channel_id)
@@ -0,0 +1,86 @@
+"""Resumen persistido de las sincronizaciones del cron para ``/metrics``.
+
+El cron corre en su propio proceso y termina, así que sus métricas no pueden
+quedarse en el registro en memoria. Cada ejecución escribe
+``data/cron_sync_status.json`` con la última ejecución (duración, filas y
+error por canal) y los totales acumulados por canal; la API lo lee al hacer
+el scrape y lo expone con un ``collector``.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from src.core.config import logger, DATA_DIR
+from src.core.metrics import registry, Counter, Gauge
+
+_lock = threading.Lock()
+
+def _path():
+    return os.path.join(DATA_DIR, "cron_sync_status.json")
+
+def load_status():
+    """Último resumen guardado, o None si el cron no ha corrido todavía."""
+    try:
+        with open(_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Resumen del cron ilegible: {e}")
+        return None
+
+def record_run(run, finished_at=None):
+    """Guarda el resumen ``run`` de sync_daily_metrics_for_all_channels y suma sus totales."""
+    with _lock:
+        previous = load_status() or {}
+        totals = previous.get("totals", {})
+        for ch in run["channels"]:
+            channel_totals = totals.setdefault(ch["channel_id"], {"rows": 0, "errors": 0})
+            channel_totals["rows"] += ch["rows"]
+            channel_totals["errors"] += 1 if ch["error"] else 0
+        status = {
+            "finished_at": finished_at or time.time(),
+            "duration": run["duration"],
+            "rows": run["rows"],
+            "errors": run["errors"],
+            "deferred": run["deferred"],
+            "channels": {ch["channel_id"]: {"rows": ch["rows"], "duration": ch["duration"], "error": ch["error"]}
+                         for ch in run["channels"]},
+            "runs": previous.get("runs", 0) + 1,
+            "totals": totals,
+        }
+        os.makedirs(DATA_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, prefix=".tmp_", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(status, f)
+        os.replace(tmp_path, _path())
+    return status
+
+@registry.collector
+def _collect_cron_metrics():
+    """Métricas del último resumen del cron, leídas del disco al hacer el scrape."""
+    runs = Counter("cron_sync_runs_total", "Completed cron sync runs.")
+    last_run = Gauge("cron_sync_last_run_timestamp_seconds", "Unix time the last cron sync finished.")
+    run_duration = Gauge("cron_sync_last_run_duration_seconds", "Wall time of the last cron sync run.")
+    run_errors = Gauge("cron_sync_last_run_errors", "Channels that failed in the last cron sync run.")
+    deferred = Gauge("cron_sync_last_run_deferred", "Channels deferred for lack of quota in the last cron sync run.")
+    duration = Gauge("cron_sync_duration_seconds", "Sync duration per channel in the last cron run.", ("channel_id",))
+    rows = Counter("cron_sync_rows_total", "Daily metric rows written by the cron sync per channel.", ("channel_id",))
+    errors = Counter("cron_sync_errors_total", "Failed channel syncs in the cron job.", ("channel_id",))
+    metrics = [runs, last_run, run_duration, run_errors, deferred, duration, rows, errors]
+
+    status = load_status()
+    if status is None:
+        return metrics
+    runs.inc(status["runs"])
+    last_run.set(status["finished_at"])
+    run_duration.set(status["duration"])
+    run_errors.set(status["errors"])
+    deferred.set(len(status["deferred"]))
+    for channel_id, ch in status["channels"].items():
+        duration.labels(channel_id).set(ch["duration"])
+    for channel_id, totals in status["totals"].items():
+        rows.labels(channel_id).inc(totals["rows"])
+        errors.labels(channel_id).inc(totals["errors"])
+    return metrics
@@ -1,80 +1,138 @@
+import argparse
 import time
+from datetime import datetime
 import schedule
-from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
-from src.core.database import SessionLocal
-from src.db.models import Channel, DailyMetric
+from src.core.database import SessionLocal, check_dialect
+from src.db.models import Channel
 from src.services.fetch_daily import fetch_daily_stats
-from src.services.auth_service import get_credentials_from_db
-from src.core.config import logger
+from src.services.metrics_service import upsert_daily_metrics
+from src.services.sync_planner import plan_daily_sync, split_range
+from src.services.youtube_clients import channel_key_id
+from src.services import quota_ledger
+from src.services.rollups import update_daily_rollups
+from src.core.config import logger, CRON_SYNC_WORKERS
+from src.services.cron_status import record_run
 
-def sync_daily_metrics_for_all_channels():
-    """Recorre todos los canales y descarga sus métricas de ayer."""
-    db: Session = SessionLocal()
+def sync_channel(channel, ranges, fetcher=fetch_daily_stats, session_factory=SessionLocal):
+    """Sincroniza un canal con su propia sesión y devuelve su resumen.
+
+    ``channel`` es una tupla (id interno, channel_id, título) y ``ranges`` la
+    lista de rangos (inicio, fin) pendientes según el planificador. Un error o
+    un rollback sólo afecta a este canal.
+    """
+    pk, channel_id, title = channel
+    summary = {"channel_id": channel_id, "title": title, "rows": 0, "queries": len(ranges),
+               "duration": 0.0, "error": None}
+    started = time.perf_counter()
+    db: Session = session_factory()
     try:
-        channels = db.query(Channel).all()
-        logger.info(f"🔄 Iniciando sincronización diaria para {len(channels)} canales...")
-        
-        for ch in channels:
-            logger.info(f"Checking channel: {ch.title} ({ch.channel_id})")
-            
-            # TODO: Add logic to check if we already have data for yesterday to save API quota
-            
-            # Fetch data using existing service (which now uses DB auth under the hood)
-            # We fetch last 3 days just to be safe and ensure data consistency
-            today = date.today()
-            start_date = (today - timedelta(days=3)).isoformat()
-            end_date = (today - timedelta(days=1)).isoformat()
-            
-            try:
-                df = fetch_daily_stats(ch.channel_id, start_date=start_date, end_date=end_date)
-                
-                if df.empty:
-                    logger.warning(f"No daily data found for {ch.title}")
-                    continue
-                    
-                # Upsert into DB
-                for _, row in df.iterrows():
-                    row_date = row['day'].date() # Assuming 'day' is datetime from fetch_daily_stats logic
-                    
-                    # Check existence
-                    metric = db.query(DailyMetric).filter(
-                        DailyMetric.channel_id_fk == ch.id, # Use internal ID FK
-                        DailyMetric.date == row_date
-                    ).first()
-                    
-                    if not metric:
-                        metric = DailyMetric(
-                            channel_id_fk=ch.id,
-                            date=row_date
-                        )
-                        db.add(metric)
-                    
-                    # Update fields
-                    metric.views = row['views']
-                    metric.likes = row['likes']
-                    metric.comments = row['comments']
-                    metric.subscribers = row['subscribers']
-                
-                db.commit()
-                logger.info(f"✅ Synced {len(df)} days for {ch.title}")
-                
-            except Exception as e:
-                logger.error(f"❌ Error syncing {ch.title}: {e}")
-                db.rollback()
+        logger.info(f"Checking channel: {title} ({channel_id})")
+        for start_date, end_date in ranges:
+            df = fetcher(channel_id, start_date=start_date.isoformat(), end_date=end_date.isoformat())
+
+            if df.empty:
+                logger.warning(f"No daily data found for {title} ({start_date} - {end_date})")
+                continue
 
+            # Upsert into DB (single INSERT ... ON CONFLICT per chunk)
+            summary["rows"] += upsert_daily_metrics(db, df, channel_pk=pk) # Use internal ID FK
+            # Sync time, used as Last-Modified by /api/analytics
+            db.query(Channel).filter(Channel.id == pk).update({"last_updated": datetime.utcnow()})
+            db.commit()
+        if summary["rows"]:
+            update_daily_rollups(db, pk, channel_id)  # Month/week/7D/28D aggregates for the dashboard
+        logger.info(f"✅ Synced {summary['rows']} days for {title}")
     except Exception as e:
-        logger.error(f"Critical Cron Error: {e}")
+        logger.error(f"❌ Error syncing {title}: {e}")
+        summary["error"] = str(e)
+        db.rollback()
     finally:
         db.close()
+        summary["duration"] = round(time.perf_counter() - started, 3)
+    return summary
+
+def sync_daily_metrics_for_all_channels(workers=None, fetcher=fetch_daily_stats, session_factory=SessionLocal,
+                                        late_days=None, dry_run=False):
+    """Recorre todos los canales en paralelo y descarga sólo las métricas que faltan.
+
+    El planificador calcula por canal los rangos pendientes (huecos desde el
+    último día guardado + ventana ``late_days`` de datos tardíos) y estima la
+    cuota antes de empezar. Cada canal corre en su propio hilo (``workers``,
+    por defecto CRON_SYNC_WORKERS) con su propia sesión. ``fetcher`` permite
+    sustituir la llamada a Analytics (p. ej. por un cliente falso en pruebas).
+    Los canales a los que no les queda cuota para sus consultas hoy se aplazan
+    (``deferred``) a la siguiente ejecución en lugar de fallar a medias.
+    Devuelve un resumen de la ejecución.
+    """
+    started = time.perf_counter()
+    run = {"channels": [], "rows": 0, "errors": 0, "duration": 0.0, "quota_units": 0, "deferred": []}
+    try:
+        with session_factory() as db:
+            channels = db.query(Channel.id, Channel.channel_id, Channel.title).all()
+            plan = plan_daily_sync(db, channels, late_days=late_days)
+    except Exception as e:
+        logger.error(f"Critical Cron Error: {e}")
+        run["errors"] = 1
+        run["duration"] = round(time.perf_counter() - started, 3)
+        if not dry_run:
+            record_run(run)
+        return run
+
+    run["quota_units"] = plan["quota_units"]
+    pending = []
+    for item in plan["channels"]:
+        if not item["ranges"]:
+            continue
+        queries = sum(len(split_range(start, end)) for start, end in item["ranges"])
+        left = quota_ledger.remaining(channel_key_id(item["channel"][1]), refresh=True)
+        if left is not None and left < queries:
+            logger.warning(f"⏸️ Deferring {item['channel'][2]}: {queries} queries needed, {left} quota units left")
+            run["deferred"].append(item["channel"][1])
+            continue
+        pending.append(item)
+    workers = max(1, workers or CRON_SYNC_WORKERS)
+    logger.info(f"🔄 Iniciando sincronización diaria: {len(pending)}/{len(channels)} canales pendientes, "
+                f"{plan['queries']} consultas (~{plan['quota_units']} unidades de cuota), {workers} hilos...")
+    if dry_run:
+        for item in pending:
+            logger.info(f"   {item['channel'][2]}: " + ", ".join(f"{s} - {e}" for s, e in item["ranges"]))
+        return run
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(sync_channel, item["channel"], item["ranges"], fetcher, session_factory)
+            for item in pending
+        ]
+        run["channels"] = [future.result() for future in futures]
+    quota_ledger.flush()  # Los cargos de toda la sincronización se escriben de una vez
+
+    run["rows"] = sum(ch["rows"] for ch in run["channels"])
+    run["errors"] = sum(1 for ch in run["channels"] if ch["error"])
+    run["duration"] = round(time.perf_counter() - started, 3)
+    record_run(run)  # Este proceso termina: /metrics de la API lee el resumen del disco
+    logger.info(f"🏁 Sincronización terminada en {run['duration']}s: "
+                f"{run['rows']} filas, {run['errors']} canales con error.")
+    for ch in run["channels"]:
+        logger.info(f"   {ch['title']} ({ch['channel_id']}): {ch['rows']} filas en {ch['duration']}s"
+                    + (f" - ERROR: {ch['error']}" if ch["error"] else ""))
+    return run
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza las métricas diarias de todos los canales.")
+    parser.add_argument("--workers", type=int, default=None, help="Canales en paralelo (CRON_SYNC_WORKERS)")
+    parser.add_argument("--late-days", type=int, default=None, help="Ventana de datos tardíos (LATE_DATA_DAYS)")
+    parser.add_argument("--dry-run", action="store_true", help="Sólo muestra el plan y la cuota estimada")
+    args = parser.parse_args()
+    check_dialect()
+
     # Run once immediately for check
-    sync_daily_metrics_for_all_channels()
-    
+    sync_daily_metrics_for_all_channels(workers=args.workers, late_days=args.late_days, dry_run=args.dry_run)
+
     # Schedule every 24h
     # schedule.every().day.at("02:00").do(sync_daily_metrics_for_all_channels)
-    
+
     # Loop
     # while True:
     #     schedule.run_pending()
@@ -0,0 +1,63 @@
+"""Registro de ventanas de Analytics que fallaron tras agotar los reintentos.
+
+Se guarda por canal en ``data/{channel_id}_failed_chunks.json`` como una lista
+de rangos ``[inicio, fin]`` (ISO). El planificador de sincronización los
+añade a los rangos pendientes, así que la siguiente ejecución vuelve a pedir
+sólo esas ventanas; cuando una se descarga bien se borra del registro.
+"""
+import json
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from src.core.config import logger, DATA_DIR
+
+_lock = threading.Lock()
+
+def _path(channel_id):
+    return os.path.join(DATA_DIR, f"{channel_id}_failed_chunks.json")
+
+def load_failed_chunks(channel_id):
+    """Rangos (date, date) pendientes de reintentar para el canal."""
+    try:
+        with open(_path(channel_id), encoding="utf-8") as f:
+            return [(date.fromisoformat(start), date.fromisoformat(end)) for start, end in json.load(f)]
+    except FileNotFoundError:
+        return []
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Registro de ventanas fallidas ilegible para {channel_id}: {e}")
+        return []
+
+def _subtract(window, covered):
+    """Partes de ``window`` que no cubre ningún rango de ``covered``."""
+    pieces = [window]
+    for c_start, c_end in covered:
+        remaining = []
+        for start, end in pieces:
+            if c_end < start or c_start > end:
+                remaining.append((start, end))
+                continue
+            if start < c_start:
+                remaining.append((start, c_start - timedelta(days=1)))
+            if end > c_end:
+                remaining.append((c_end + timedelta(days=1), end))
+        pieces = remaining
+    return pieces
+
+def record_chunks(channel_id, failed=(), succeeded=()):
+    """Añade las ventanas ``failed`` y quita del registro los días cubiertos por ``succeeded``."""
+    if not failed and not succeeded:
+        return
+    with _lock:
+        pending = {piece for window in load_failed_chunks(channel_id) for piece in _subtract(window, succeeded)}
+        pending.update(failed)
+        path = _path(channel_id)
+        if not pending:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(DATA_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, prefix=".tmp_", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([[start.isoformat(), end.isoformat()] for start, end in sorted(pending)], f)
+        os.replace(tmp_path, path)
@@ -1,49 +1,100 @@
-import os
 import pandas as pd
-from datetime import datetime, timedelta, date
-from src.core.config import logger, DATA_DIR
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from src.core.config import logger, SYNC_START_DATE, ANALYTICS_CHUNK_DAYS, ANALYTICS_CHUNK_RETRIES, ANALYTICS_REPORT_CONCURRENCY
 from src.services.api_youtube_analytics import get_youtube_analytics_service
+from src.core.tracing import bind
+from src.services.youtube_clients import execute, YouTubeAPIError
+from src.services.sync_planner import split_range
+from src.services.failed_chunks import record_chunks
 
-def fetch_daily_stats(channel_id, start_date=None, end_date=None, metrics="views,likes,comments,subscribersGained"):
-    """Consulta reportes diarios de YouTube Analytics."""
-    try:
-        youtube_analytics = get_youtube_analytics_service(channel_id)
-        if not youtube_analytics:
-             logger.warning(f"No hay servicio de Analytics disponible para {channel_id} (Falta Token).")
-             return pd.DataFrame()
-
-        # Fechas: desde el inicio del canal si no se pasa rango
-        if end_date is None:
-            end_date = (date.today() - pd.Timedelta(days=1)).isoformat()
-        if start_date is None:
-            start_date = "2022-12-31"  
-
-        logger.info(f"Consultando estadísticas diarias desde {start_date} hasta {end_date}...")
-
-        request = youtube_analytics.reports().query(
-            ids=f"channel=={channel_id}",
-            startDate=start_date,
-            endDate=end_date,
-            metrics=metrics,
-            dimensions="day",
-            sort="day"
-        )
-        response = request.execute()
-
-        headers = [h["name"] for h in response.get("columnHeaders", [])]
+def _query_chunk(youtube_analytics, channel_id, start, end, metrics, retries):
+    """Una ventana del reporte diario; ``execute`` reintenta los errores transitorios."""
+    request = youtube_analytics.reports().query(
+        ids=f"channel=={channel_id}",
+        startDate=start.isoformat(),
+        endDate=end.isoformat(),
+        metrics=metrics,
+        dimensions="day",
+        sort="day"
+    )
+    return execute(request, retries=retries)
+
+def fetch_daily_stats(channel_id, start_date=None, end_date=None, metrics="views,likes,comments,subscribersGained",
+                      chunk_days=None, retries=None, concurrency=None):
+    """
+    Consulta reportes diarios de YouTube Analytics.
+
+    Los rangos largos se dividen en ventanas de ``chunk_days`` días (por
+    defecto ANALYTICS_CHUNK_DAYS) que se piden en paralelo, con reintentos por
+    ventana, y se unen en orden. Las ventanas que siguen fallando por un error
+    transitorio se registran (ver failed_chunks) para que la siguiente
+    sincronización pida sólo esas; el resultado incluye las que sí se
+    obtuvieron. Un error permanente (403, cuota agotada, token revocado) o que
+    fallen todas las ventanas lanza ``YouTubeAPIError``: un DataFrame vacío
+    significa sólo "sin datos en el rango".
+    """
+    youtube_analytics = get_youtube_analytics_service(channel_id)
+    if not youtube_analytics:
+        # Sin credenciales válidas (nunca autorizado o refresh token revocado)
+        raise YouTubeAPIError(f"No valid Analytics credentials for {channel_id}; re-authorize the channel",
+                              status=401, reason="authError")
+
+    # Fechas: desde el inicio del canal si no se pasa rango
+    if end_date is None:
+        end_date = (date.today() - pd.Timedelta(days=1)).isoformat()
+    if start_date is None:
+        start_date = SYNC_START_DATE
+
+    logger.info(f"Consultando estadísticas diarias desde {start_date} hasta {end_date}...")
+
+    chunks = split_range(date.fromisoformat(str(start_date)), date.fromisoformat(str(end_date)),
+                         chunk_days or ANALYTICS_CHUNK_DAYS)
+    if not chunks:
+        return pd.DataFrame()
+    retries = ANALYTICS_CHUNK_RETRIES if retries is None else retries
+    workers = max(1, min(concurrency or ANALYTICS_REPORT_CONCURRENCY, len(chunks)))
+
+    def run(chunk):
+        try:
+            return _query_chunk(youtube_analytics, channel_id, *chunk, metrics, retries), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analytics-chunk") as pool:
+        results = list(pool.map(bind(run), chunks))  # map conserva el orden de las ventanas
+
+    frames, failed, succeeded, permanent = [], [], [], None
+    for chunk, (response, error) in zip(chunks, results):
+        if error is not None:
+            logger.error(f"Ventana {chunk[0]} - {chunk[1]} de Analytics falló para {channel_id}: {error}")
+            failed.append(chunk)
+            if permanent is None and not getattr(error, "retryable", False):
+                permanent = error
+            continue
+        succeeded.append(chunk)
         rows = response.get("rows", [])
+        if rows:
+            frames.append(pd.DataFrame(rows, columns=[h["name"] for h in response.get("columnHeaders", [])]))
+
+    if permanent is not None or not succeeded:
+        # Las ventanas obtenidas se descartan: no se quitan del registro de pendientes
+        record_chunks(channel_id, failed=failed)
+        error = permanent or results[0][1]
+        if isinstance(error, YouTubeAPIError):
+            raise error
+        raise YouTubeAPIError(f"Analytics daily report failed for {channel_id}: {error}") from error
+    record_chunks(channel_id, failed=failed, succeeded=succeeded)
+
+    if not frames:
+        logger.warning("No se encontraron datos en el reporte de Analytics.")
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(subset="day", keep="last")
+    if "subscribersGained" in df.columns:
+        df.rename(columns={"subscribersGained": "subscribers"}, inplace=True)
 
-        if not rows:
-            logger.warning("No se encontraron datos en el reporte de Analytics.")
-            return pd.DataFrame()
-
-        df = pd.DataFrame(rows, columns=headers)
-        if "subscribersGained" in df.columns:
-            df.rename(columns={"subscribersGained": "subscribers"}, inplace=True)
-            
-        df["day"] = pd.to_datetime(df["day"])
-        logger.info(f"Estadísticas diarias obtenidas: {len(df)} días.")
-        return df
-    except Exception as e:
-        logger.error(f"Error al obtener estadísticas diarias de Analytics: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+    df["day"] = pd.to_datetime(df["day"])
+    logger.info(f"Estadísticas diarias obtenidas: {len(df)} días en {len(chunks)} ventanas"
+                f"{f' ({len(failed)} fallidas)' if failed else ''}.")
+    return df
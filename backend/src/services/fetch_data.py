@@ -1,65 +1,197 @@
+import math
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from src.services.api_youtube import get_channel_stats, get_video_stats, get_videos_from_playlist
-from src.core.config import logger, DATA_DIR
+from src.core.config import logger, DATA_DIR, FETCH_CONCURRENCY
+from src.core.tracing import bind
 import os
 
-def fetch_all_videos(channel_id, api_key=None):
-    """Descarga todos los videos de un canal y devuelve DataFrame."""
+def _video_row(item):
+    """Convierte un item de videos.list en una fila del DataFrame."""
+    return {
+        "Video ID": item["id"],
+        "Titulo": item["snippet"]["title"],     # Nombre normalizado sin tildes para el código
+        "Publicado": item["snippet"]["publishedAt"],
+        "Miniatura": item["snippet"]["thumbnails"]["medium"]["url"],
+        "Duracion": item["contentDetails"]["duration"],
+        "Vistas": int(item["statistics"].get("viewCount", 0)),
+        "Likes": int(item["statistics"].get("likeCount", 0)),
+        "Comentarios": int(item["statistics"].get("commentCount", 0)),
+    }
+
+def fetch_all_videos(channel_id, api_key=None, concurrency=None, on_progress=None):
+    """Descarga todos los videos de un canal y devuelve DataFrame.
+
+    El paginador de la playlist va encolando lotes de IDs en un pool de hilos
+    acotado (``concurrency``, por defecto FETCH_CONCURRENCY) que consulta
+    videos.list en paralelo. El orden de salida es el mismo que el de la playlist.
+    ``on_progress(pages=..., videos=...)`` recibe el avance, si se indica.
+
+    Un error de la API (ya reintentado por ``execute``) aborta la descarga con
+    ``YouTubeAPIError`` en lugar de devolver un catálogo incompleto.
+    """
+    progress = on_progress or _no_progress
     if not channel_id:
         logger.error("CHANNEL_ID no proporcionado")
         return pd.DataFrame()
 
     # 1️⃣ Obtener playlist de uploads
-    try:
-        channel_data = get_channel_stats(channel_id, api_key=api_key)
-        if not channel_data or "items" not in channel_data:
-            logger.error(f"No se pudo obtener información del canal {channel_id}")
-            return pd.DataFrame()
-        
-        uploads_id = channel_data["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
-    except Exception as e:
-        logger.error(f"Error al obtener playlist de uploads: {e}")
+    uploads_id = _get_uploads_playlist(channel_id, api_key)
+    if not uploads_id:
         return pd.DataFrame()
 
     # 2️⃣ Iterar todas las páginas de la playlist
-    videos = []
+    workers = max(1, concurrency or FETCH_CONCURRENCY)
+    fetch_stats = bind(get_video_stats)  # Los spans de los hilos van a la traza de la petición
+    pending = []  # Futures en el orden de la playlist
     next_page = None
 
-    logger.info(f"Iniciando descarga de videos para el canal {channel_id}...")
+    logger.info(f"Iniciando descarga de videos para el canal {channel_id} ({workers} hilos)...")
 
-    while True:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
         try:
-            playlist_data = get_videos_from_playlist(uploads_id, page_token=next_page, api_key=api_key)
-            if not playlist_data or not playlist_data.get("items"):
-                break
-                
-            video_ids = [item["contentDetails"]["videoId"] for item in playlist_data["items"]]
-
-            # 3️⃣ Obtener estadísticas de esos videos
-            stats = get_video_stats(video_ids, api_key=api_key)
-
-            for item in stats.get("items", []):
-                videos.append({
-                    "Video ID": item["id"],
-                    "Titulo": item["snippet"]["title"],     # Nombre normalizado sin tildes para el código
-                    "Publicado": item["snippet"]["publishedAt"],
-                    "Miniatura": item["snippet"]["thumbnails"]["medium"]["url"],
-                    "Duracion": item["contentDetails"]["duration"],  
-                    "Vistas": int(item["statistics"].get("viewCount", 0)),
-                    "Likes": int(item["statistics"].get("likeCount", 0)),
-                    "Comentarios": int(item["statistics"].get("commentCount", 0)),
-                })
-
-            next_page = playlist_data.get("nextPageToken")
-            if not next_page:
-                break
-        except Exception as e:
-            logger.error(f"Error durante la iteración de videos: {e}")
-            break
+            while True:
+                playlist_data = get_videos_from_playlist(uploads_id, page_token=next_page, api_key=api_key)
+                if not playlist_data or not playlist_data.get("items"):
+                    break
+
+                video_ids = [item["contentDetails"]["videoId"] for item in playlist_data["items"]]
+
+                # 3️⃣ Obtener estadísticas de esos videos (en segundo plano)
+                pending.append(pool.submit(fetch_stats, video_ids, api_key=api_key))
+                progress(pages=len(pending))
+
+                next_page = playlist_data.get("nextPageToken")
+                if not next_page:
+                    break
+
+            videos = []
+            for future in pending:
+                videos.extend(_video_row(item) for item in future.result().get("items", []))
+                progress(videos=len(videos))
+        except Exception:
+            for future in pending:
+                future.cancel()
+            raise
 
     logger.info(f"Descarga completada. Total videos: {len(videos)}")
+    return _videos_frame(videos)
+
+def video_sync_cost(known, mode="incremental"):
+    """Unidades de cuota estimadas para sincronizar un catálogo de ``known`` videos.
+
+    ``full`` pide cada página de la playlist más su videos.list; ``incremental``
+    una página de playlist, los detalles de los nuevos y las estadísticas de
+    todos; ``statistics`` sólo las estadísticas. channels.list suma 1 salvo en
+    ``statistics``.
+    """
+    batches = math.ceil(known / 50)
+    if mode == "statistics":
+        return batches
+    if mode == "full":
+        return 1 + 2 * max(1, batches)
+    return 1 + 2 + batches
+
+def sync_videos(channel_id, existing=None, api_key=None, full=False, concurrency=None, on_progress=None,
+                stats_only=False):
+    """Sincronización incremental de videos a partir de un DataFrame ya guardado.
+
+    Recorre la playlist de uploads (de más reciente a más antiguo) sólo hasta
+    encontrar un ID conocido, descarga snippet/contentDetails para los videos
+    nuevos y refresca únicamente ``statistics`` de los existentes, en lotes de 50.
+    Con ``full=True`` o sin datos previos hace una descarga completa. Con
+    ``stats_only=True`` (poca cuota) no se buscan videos nuevos: sólo se
+    refrescan las estadísticas. Los errores de la API se propagan
+    (``YouTubeAPIError``) para no guardar una sincronización a medias, y si el
+    canal ya no aparece se lanza ``ValueError`` en lugar de devolver un
+    catálogo vacío.
+    """
+    if full or existing is None or existing.empty or "Video ID" not in existing.columns:
+        return fetch_all_videos(channel_id, api_key=api_key, concurrency=concurrency, on_progress=on_progress)
+
+    progress = on_progress or _no_progress
+    pages = 0
+
+    uploads_id = None
+    if not stats_only:
+        uploads_id = _get_uploads_playlist(channel_id, api_key)
+        if not uploads_id:
+            # Un DataFrame vacío reemplazaría el catálogo guardado
+            raise ValueError(f"Channel {channel_id} not found; keeping the cached catalog")
+
+    known_ids = existing["Video ID"].astype(str).tolist()
+    known = set(known_ids)
+    workers = max(1, concurrency or FETCH_CONCURRENCY)
+    fetch_stats = bind(get_video_stats)  # Los spans de los hilos van a la traza de la petición
+    new_pending = []
+    next_page = None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # 1️⃣ Videos nuevos: recorrer la playlist hasta el primer ID conocido
+        stats_pending = []
+        try:
+            while uploads_id:  # Sin playlist (stats_only) no se buscan nuevos
+                playlist_data = get_videos_from_playlist(uploads_id, page_token=next_page, api_key=api_key)
+                if not playlist_data or not playlist_data.get("items"):
+                    break
+
+                video_ids = [item["contentDetails"]["videoId"] for item in playlist_data["items"]]
+                new_ids = [vid for vid in video_ids if vid not in known]
+                if new_ids:
+                    new_pending.append(pool.submit(fetch_stats, new_ids, api_key=api_key))
+                pages += 1
+                progress(pages=pages)
+
+                next_page = playlist_data.get("nextPageToken")
+                if len(new_ids) < len(video_ids) or not next_page:
+                    break
+
+            # 2️⃣ Videos existentes: sólo statistics, en lotes de 50
+            stats_pending = [
+                pool.submit(fetch_stats, known_ids[i:i + 50], api_key=api_key, part="statistics")
+                for i in range(0, len(known_ids), 50)
+            ]
+
+            new_videos = []
+            for future in new_pending:
+                new_videos.extend(_video_row(item) for item in future.result().get("items", []))
+                progress(videos=len(new_videos))
+
+            statistics = {}
+            for future in stats_pending:
+                statistics.update((item["id"], item.get("statistics", {})) for item in future.result().get("items", []))
+                progress(videos=len(new_videos) + len(statistics))
+        except Exception:
+            for future in new_pending + stats_pending:
+                future.cancel()
+            raise
+
+    # Los videos que la API ya no devuelve (borrados/privados) conservan sus últimas estadísticas
+    updated = existing.copy()
+    ids = updated["Video ID"].astype(str)
+    mask = ids.isin(statistics)
+    for col, key in (("Vistas", "viewCount"), ("Likes", "likeCount"), ("Comentarios", "commentCount")):
+        updated.loc[mask, col] = ids[mask].map(lambda vid: int(statistics[vid].get(key, 0)))
+
+    logger.info(f"Sincronización incremental de {channel_id}: {len(new_videos)} nuevos, "
+                f"{int(mask.sum())}/{len(updated)} estadísticas actualizadas.")
+    return pd.concat([_videos_frame(new_videos), updated], ignore_index=True) if new_videos else updated
+
+def _no_progress(**kwargs):
+    pass
+
+def _get_uploads_playlist(channel_id, api_key=None):
+    """Devuelve el ID de la playlist de uploads del canal (o None si el canal no existe)."""
+    channel_data = get_channel_stats(channel_id, api_key=api_key)
+    if not channel_data or not channel_data.get("items"):
+        logger.error(f"No se pudo obtener información del canal {channel_id}")
+        return None
+
+    return channel_data["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
+
+def _videos_frame(videos):
     df = pd.DataFrame(videos)
-    
+
     # Asegurar que las columnas existen para evitar NameError en UI
     expected_cols = ["Video ID", "Titulo", "Publicado", "Miniatura", "Vistas", "Likes", "Comentarios"]
     for col in expected_cols:
@@ -0,0 +1,118 @@
+from sqlalchemy.orm import Session
+from ..db.models import Channel, DailyMetric
+from ..core.config import ANALYTICS_TOPUP_INTERVAL
+from ..core.database import dialect_insert
+from .fetch_daily import fetch_daily_stats
+from .rollups import update_daily_rollups
+from .sync_planner import latest_metric_dates, plan_ranges, clip_ranges
+from .failed_chunks import load_failed_chunks, record_chunks
+from datetime import date, datetime, timedelta
+import threading
+import time
+import pandas as pd
+
+METRIC_COLUMNS = ["views", "likes", "comments", "subscribers"]
+UPSERT_CHUNK_SIZE = 5000
+
+_top_up_lock = threading.Lock()
+_last_top_up = {}  # channel_id -> (planned ranges, monotonic time) of the last live Analytics top-up
+
+def _metric_rows(df: pd.DataFrame, channel_pk=None):
+    """Converts a daily stats DataFrame into plain dicts for DailyMetric."""
+    data = pd.DataFrame({
+        "channel_id_fk": channel_pk if channel_pk is not None else df["channel_id_fk"],
+        "date": pd.to_datetime(df["day"]).dt.date,
+    })
+    for col in METRIC_COLUMNS:
+        values = df[col] if col in df.columns else pd.Series(0, index=df.index)
+        data[col] = pd.to_numeric(values, errors="coerce").fillna(0).astype("int64")
+    # Last value wins if the same (channel, date) appears twice in one batch
+    data = data.drop_duplicates(subset=["channel_id_fk", "date"], keep="last")
+    return data.to_dict(orient="records")
+
+def upsert_daily_metrics(db: Session, df: pd.DataFrame, channel_pk=None, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Inserts or updates daily metrics in bulk with INSERT ... ON CONFLICT.
+
+    ``df`` uses the fetch_daily_stats layout (day, views, likes, comments,
+    subscribers). Pass ``channel_pk`` for a single channel, or include a
+    ``channel_id_fk`` column to upsert several channels at once.
+    The caller is responsible for committing.
+    """
+    if df is None or df.empty:
+        return 0
+
+    rows = _metric_rows(df, channel_pk)
+    insert = dialect_insert(db.get_bind())
+    stmt = insert(DailyMetric)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["channel_id_fk", "date"],
+        set_={col: stmt.excluded[col] for col in METRIC_COLUMNS},
+    )
+    # One compiled statement, executed in chunks (executemany)
+    for start in range(0, len(rows), chunk_size):
+        db.execute(stmt, rows[start:start + chunk_size])
+    return len(rows)
+
+def get_daily_metrics(db: Session, channel_pk, start=None, end=None):
+    """
+    Returns the stored daily metrics of a channel as API records, oldest first.
+
+    ``start``/``end`` (inclusive) are pushed down into SQL and served by the
+    unique (channel_id_fk, date) index.
+    """
+    query = db.query(DailyMetric.date, *(getattr(DailyMetric, col) for col in METRIC_COLUMNS)).filter(
+        DailyMetric.channel_id_fk == channel_pk
+    )
+    if start:
+        query = query.filter(DailyMetric.date >= start)
+    if end:
+        query = query.filter(DailyMetric.date <= end)
+
+    return [
+        {"day": row.date.isoformat(), **{col: getattr(row, col) or 0 for col in METRIC_COLUMNS}}
+        for row in query.order_by(DailyMetric.date).all()
+    ]
+
+def top_up_daily_metrics(db: Session, channel: Channel, end_date=None, late_days=0, force=False, max_days=None,
+                         fetcher=fetch_daily_stats):
+    """
+    Fetches from Analytics only the days that are missing for ``channel`` and upserts them.
+
+    Live top-ups are throttled per channel: the same planned ranges are not
+    requested again within ANALYTICS_TOPUP_INTERVAL seconds (recent days are
+    often not published yet), while a request that needs other days goes
+    through. ``force`` skips the throttle. With ``max_days`` only the last
+    ``max_days`` days are fetched here; older missing days are recorded as
+    pending windows (see failed_chunks) for the cron sync or a refresh job to
+    backfill. Returns the number of rows written.
+    """
+    yesterday = date.today() - timedelta(days=1)
+    end_date = min(end_date or yesterday, yesterday)
+    last_date = latest_metric_dates(db, [channel.id]).get(channel.id)
+
+    pending = load_failed_chunks(channel.channel_id)
+    ranges = plan_ranges(last_date, end_date=end_date, late_days=late_days, pending=pending)
+    if max_days:
+        ranges, older = clip_ranges(ranges, end_date - timedelta(days=max_days - 1))
+        record_chunks(channel.channel_id, failed=older)
+    if not ranges:
+        return 0
+
+    now = time.monotonic()
+    with _top_up_lock:
+        last_plan, last_attempt = _last_top_up.get(channel.channel_id, (None, None))
+        if not force and last_plan == ranges and now - last_attempt < ANALYTICS_TOPUP_INTERVAL:
+            return 0
+        _last_top_up[channel.channel_id] = (ranges, now)
+
+    rows = 0
+    for start, end in ranges:
+        df = fetcher(channel.channel_id, start_date=start.isoformat(), end_date=end.isoformat())
+        rows += upsert_daily_metrics(db, df, channel_pk=channel.id)
+
+    if rows:
+        channel.last_updated = datetime.utcnow()
+        db.commit()
+        update_daily_rollups(db, channel.id, channel.channel_id)
+    return rows
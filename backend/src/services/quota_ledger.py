@@ -0,0 +1,185 @@
+"""Libro de cuota de la API de YouTube por clave y día.
+
+Cada llamada que sale por ``youtube_clients.execute`` se anota en la tabla
+``quota_usage`` con su coste documentado en unidades, bajo la misma clave que
+usa el limitador de ritmo: ``key:<hash de la API key>`` o ``oauth:<canal>``
+(la API key nunca se guarda en claro). Google reinicia la cuota a medianoche
+de la hora del Pacífico, así que el día del libro es el de America/Los_Angeles.
+
+Cada cargo se suma en memoria (el total que usa la comprobación previa a cada
+llamada) y se acumula como pendiente; ``flush`` los escribe todos en una sola
+transacción, un ``INSERT ... ON CONFLICT`` por clave que devuelve el total del
+día. Se vacía al final de cada trabajo de refresco, sincronización del cron o
+top-up en vivo, cada QUOTA_FLUSH_INTERVAL segundos como mucho y al salir del
+proceso. Otros procesos (cron) escriben en la misma tabla y sus cargos se ven
+tras el siguiente ``flush`` o con ``remaining(..., refresh=True)``.
+"""
+import atexit
+import threading
+from datetime import datetime, time, timedelta, timezone
+from time import monotonic
+from zoneinfo import ZoneInfo
+from sqlalchemy import func
+from src.core.config import logger, QUOTA_DAILY_BUDGET, QUOTA_RESERVE, QUOTA_FLUSH_INTERVAL
+from src.core.database import engine, dialect_insert
+from src.db.models import QuotaUsage
+
+PACIFIC = ZoneInfo("America/Los_Angeles")
+
+# Coste en unidades por methodId (https://developers.google.com/youtube/v3/determine_quota_cost)
+COSTS = {
+    "youtube.channels.list": 1,
+    "youtube.playlistItems.list": 1,
+    "youtube.videos.list": 1,
+    "youtube.search.list": 100,
+    "youtubeAnalytics.reports.query": 1,
+}
+DEFAULT_COST = 1
+
+_lock = threading.Lock()
+_used = {}  # (clave, día) -> unidades gastadas según el último cargo/lectura
+_pending = {}  # (clave, día) -> [unidades, llamadas] cargadas y aún no escritas en la BD
+_last_flush = monotonic()
+
+class QuotaBudgetError(Exception):
+    """No queda presupuesto de cuota suficiente para la operación hoy."""
+
+def quota_day(now=None):
+    """Día de cuota (hora del Pacífico) de ``now`` (UTC por defecto)."""
+    return (now or datetime.now(timezone.utc)).astimezone(PACIFIC).date()
+
+def resets_at(now=None):
+    """Momento (UTC) en que Google reinicia la cuota: la próxima medianoche del Pacífico."""
+    midnight = datetime.combine(quota_day(now) + timedelta(days=1), time(), tzinfo=PACIFIC)
+    return midnight.astimezone(timezone.utc)
+
+def cost_of(method_id):
+    return COSTS.get(method_id, DEFAULT_COST)
+
+def charge(key, units, calls=1, bind=engine):
+    """Suma ``units`` al día actual de ``key`` y devuelve el total gastado hoy.
+
+    El cargo queda pendiente en memoria hasta el siguiente ``flush``.
+    """
+    day = quota_day()
+    with _lock:
+        pending = _pending.setdefault((key, day), [0, 0])
+        pending[0] += units
+        pending[1] += calls
+        total = _used[(key, day)] = _used.get((key, day), 0) + units
+        due = monotonic() - _last_flush >= QUOTA_FLUSH_INTERVAL
+    if due:
+        flush(bind)
+    return total
+
+def flush(bind=engine):
+    """Escribe los cargos pendientes en una sola transacción y refresca los totales del día."""
+    global _last_flush
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+        _last_flush = monotonic()
+    if not batch:
+        return
+    totals = {}
+    try:
+        insert = dialect_insert(bind)
+        with bind.begin() as conn:
+            for (key, day), (units, calls) in batch.items():
+                stmt = insert(QuotaUsage).values(key=key, day=day, units=units, calls=calls)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["key", "day"],
+                    set_={
+                        "units": QuotaUsage.units + stmt.excluded.units,
+                        "calls": QuotaUsage.calls + stmt.excluded.calls,
+                        "updated_at": func.now(),
+                    },
+                ).returning(QuotaUsage.units)
+                totals[(key, day)] = conn.execute(stmt).scalar_one()
+    except Exception as e:
+        # Un fallo del libro no debe tumbar las llamadas: los cargos se reintentan en el siguiente flush
+        logger.warning(f"Could not record quota usage for {', '.join(key for key, _ in batch)}: {e}")
+        with _lock:
+            for slot, (units, calls) in batch.items():
+                pending = _pending.setdefault(slot, [0, 0])
+                pending[0] += units
+                pending[1] += calls
+        return
+    with _lock:
+        for slot, total in totals.items():
+            _used[slot] = total + _pending.get(slot, (0, 0))[0]
+
+atexit.register(flush)
+
+def _unflushed(key, day):
+    """(unidades, llamadas) de ``key`` cargadas en este proceso y aún no escritas."""
+    with _lock:
+        units, calls = _pending.get((key, day), (0, 0))
+    return units, calls
+
+def _read(keys, day, bind=engine):
+    with bind.connect() as conn:
+        rows = conn.execute(
+            QuotaUsage.__table__.select().where(QuotaUsage.key.in_(list(keys)), QuotaUsage.day == day)
+        ).all()
+    return {row.key: row for row in rows}
+
+def used(key, refresh=False, bind=engine):
+    """Unidades gastadas hoy por ``key``; sin ``refresh`` usa el último total conocido."""
+    day = quota_day()
+    with _lock:
+        cached = _used.get((key, day))
+    if cached is not None and not refresh:
+        return cached
+    try:
+        row = _read([key], day, bind).get(key)
+    except Exception as e:
+        logger.warning(f"Could not read quota usage for {key}: {e}")
+        return cached or 0
+    total = (row.units if row is not None else 0) + _unflushed(key, day)[0]
+    with _lock:
+        _used[(key, day)] = total
+    return total
+
+def remaining(key, refresh=False, budget=None, bind=engine):
+    """Unidades que le quedan hoy a ``key``, o None si el presupuesto no está limitado."""
+    budget = QUOTA_DAILY_BUDGET if budget is None else budget
+    if budget <= 0:
+        return None
+    return max(0, budget - used(key, refresh=refresh, bind=bind))
+
+def allows(key, units):
+    """¿Cabe una llamada de ``units`` unidades en el presupuesto de hoy?"""
+    left = remaining(key)
+    return left is None or left >= units
+
+def is_low(left, needed=0, reserve=None):
+    """¿Quedaría ``left`` por debajo de la reserva tras gastar ``needed``?"""
+    reserve = QUOTA_RESERVE if reserve is None else reserve
+    return left is not None and left - needed < reserve
+
+def usage(keys, bind=engine):
+    """Resumen del día para ``keys`` (lo que devuelve ``/api/quota``)."""
+    day = quota_day()
+    rows = _read(keys, day, bind) if keys else {}
+    budget = QUOTA_DAILY_BUDGET if QUOTA_DAILY_BUDGET > 0 else None
+    entries = []
+    for key in keys:
+        row = rows.get(key)
+        units, calls = _unflushed(key, day)
+        spent = (row.units if row is not None else 0) + units
+        with _lock:
+            _used[(key, day)] = spent
+        entries.append({
+            "key": key,
+            "used": spent,
+            "calls": (row.calls if row is not None else 0) + calls,
+            "remaining": None if budget is None else max(0, budget - spent),
+        })
+    return {
+        "day": day.isoformat(),
+        "resets_at": resets_at().isoformat(),
+        "budget": budget,
+        "reserve": QUOTA_RESERVE,
+        "keys": entries,
+    }
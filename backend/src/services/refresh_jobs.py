@@ -0,0 +1,194 @@
+"""Trabajos de refresco en segundo plano (videos + Analytics) con consulta de estado.
+
+``POST /api/refresh`` encola un trabajo y devuelve su ID al momento; el trabajo
+corre en un pool de hilos acotado, con una cola de pendientes limitada y como
+mucho un trabajo activo por canal.
+
+Antes de cada fase se consulta el libro de cuota: con poco presupuesto el
+refresco de videos se degrada a sólo estadísticas y la fase de Analytics se
+salta (la recupera el cron); sin presupuesto el trabajo queda ``deferred``.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src.core.config import logger, API_KEY, LATE_DATA_DAYS, REFRESH_WORKERS, REFRESH_QUEUE_SIZE
+from src.core.database import SessionLocal
+from src.core.cache_store import read_cache
+from src.core.response_cache import response_cache
+from src.services.analytics_reports import report_cache
+from src.services.fetch_data import sync_videos, video_sync_cost
+from src.services.youtube_clients import api_key_id, channel_key_id
+from src.services import quota_ledger
+from src.services.quota_ledger import QuotaBudgetError
+from src.services.video_query import write_videos
+from src.services.auth_service import get_channel_by_id
+from src.services.metrics_service import top_up_daily_metrics
+
+MAX_FINISHED_JOBS = 200  # Trabajos terminados que se conservan para consultar su estado
+
+class QueueFullError(Exception):
+    """No caben más trabajos pendientes en la cola."""
+
+class RefreshJob:
+    def __init__(self, channel_id, full=False):
+        self.id = uuid.uuid4().hex
+        self.channel_id = channel_id
+        self.full = full
+        self.status = "queued"  # queued | running | succeeded | failed | deferred
+        self.phase = "queued"   # queued | videos | analytics | done
+        self.mode = None        # full | incremental | statistics (según la cuota disponible)
+        self.skipped = []       # Fases saltadas por falta de cuota
+        self.pages = 0
+        self.videos = 0
+        self.analytics_rows = 0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def progress(self, pages=None, videos=None):
+        if pages is not None:
+            self.pages = pages
+        if videos is not None:
+            self.videos = videos
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "channel_id": self.channel_id,
+            "full": self.full,
+            "status": self.status,
+            "phase": self.phase,
+            "mode": self.mode,
+            "skipped": self.skipped,
+            "pages_fetched": self.pages,
+            "videos_processed": self.videos,
+            "analytics_rows": self.analytics_rows,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+def refresh_channel(job, api_key):
+    """Refresca videos (incremental salvo ``job.full``) y métricas diarias de un canal."""
+    # 1. Videos
+    job.phase = "videos"
+    existing = None
+    if not job.full:
+        try:
+            existing = read_cache("videos", job.channel_id)
+        except Exception as e:
+            logger.error(f"Refresh: Could not read video cache, doing full resync: {e}")
+    job.mode = _video_mode(job, existing, api_key)
+    df_videos = sync_videos(job.channel_id, existing, api_key=api_key, full=job.mode == "full",
+                            on_progress=job.progress, stats_only=job.mode == "statistics")
+    if df_videos.empty:
+        # Canal inexistente o sin uploads: no se pisa la caché con un catálogo vacío
+        raise ValueError(f"No videos returned for {job.channel_id}; cached catalog left untouched")
+    write_videos(df_videos, job.channel_id)
+    job.videos = len(df_videos)
+
+    # 2. Analytics (Daily Stats): missing days + late-data window
+    job.phase = "analytics"
+    if quota_ledger.is_low(quota_ledger.remaining(channel_key_id(job.channel_id), refresh=True)):
+        logger.warning(f"Refresh: Analytics quota low for {job.channel_id}; leaving it to the next cron run")
+        job.skipped.append("analytics")
+    else:
+        _top_up_analytics(job)
+
+    report_cache.invalidate(job.channel_id)
+    response_cache.invalidate(job.channel_id)
+
+def _video_mode(job, existing, api_key):
+    """full | incremental | statistics según la cuota que le queda hoy a la API key.
+
+    Las sincronizaciones con búsqueda de videos nuevos no tocan la reserva
+    (QUOTA_RESERVE); el refresco de sólo estadísticas sí puede gastarla.
+    """
+    known = 0 if existing is None else len(existing)
+    mode = "full" if job.full or not known else "incremental"
+    left = quota_ledger.remaining(api_key_id(api_key or API_KEY), refresh=True)
+    if not quota_ledger.is_low(left, video_sync_cost(known, mode)):
+        return mode
+    if known and left >= video_sync_cost(known, "statistics"):
+        logger.warning(f"Refresh: Quota low for {job.channel_id} ({left} units left); statistics-only refresh")
+        return "statistics"
+    raise QuotaBudgetError(f"Quota budget exhausted ({left} units left); retry after "
+                           f"{quota_ledger.resets_at().isoformat()}")
+
+def _top_up_analytics(job):
+    try:
+        with SessionLocal() as db:
+            channel = get_channel_by_id(db, job.channel_id)
+            if channel:
+                job.analytics_rows = top_up_daily_metrics(db, channel, late_days=LATE_DATA_DAYS, force=True)
+    except Exception as e:
+        logger.error(f"Refresh: Failed to update analytics for {job.channel_id}: {e}")
+
+class RefreshJobManager:
+    def __init__(self, workers=REFRESH_WORKERS, max_pending=REFRESH_QUEUE_SIZE):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job_id -> RefreshJob
+        self._active = {}           # channel_id -> RefreshJob
+
+    def submit(self, channel_id, api_key, full=False):
+        """Encola un refresco. Devuelve (job, created); reutiliza el trabajo activo del canal."""
+        with self._lock:
+            current = self._active.get(channel_id)
+            if current is not None:
+                return current, False
+
+            pending = sum(1 for job in self._active.values() if job.status == "queued")
+            if pending >= self.max_pending:
+                raise QueueFullError(f"Refresh queue is full ({self.max_pending} pending jobs)")
+
+            job = RefreshJob(channel_id, full=full)
+            self._jobs[job.id] = job
+            self._active[channel_id] = job
+            self._trim()
+
+        self._executor.submit(self._run, job, api_key)
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, api_key):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            refresh_channel(job, api_key)
+            job.status = "succeeded"
+            logger.info(f"Refresh job {job.id} for {job.channel_id} done: {job.videos} videos, "
+                        f"{job.analytics_rows} analytics rows")
+        except QuotaBudgetError as e:
+            logger.warning(f"Refresh job {job.id} for {job.channel_id} deferred: {e}")
+            job.status = "deferred"
+            job.error = str(e)
+        except Exception as e:
+            logger.error(f"Refresh job {job.id} for {job.channel_id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            quota_ledger.flush()
+            job.phase = "done"
+            job.finished_at = time.time()
+            with self._lock:
+                self._active.pop(job.channel_id, None)
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+refresh_jobs = RefreshJobManager()
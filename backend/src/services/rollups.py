@@ -0,0 +1,138 @@
+"""Agregados precalculados (rollups) por mes, semana ISO y ventanas móviles.
+
+Se calculan una sola vez al sincronizar (catálogo de videos o métricas
+diarias) y se guardan en ``data/`` con cache_store, de modo que el dashboard
+no vuelve a agrupar todo el catálogo en cada visita.
+
+Cada rollup es una tabla larga con columnas ``granularity`` (``month``,
+``week``, ``7D``, ``28D``), ``label``, ``period`` (inicio del periodo),
+las métricas y ``count`` (videos o días agregados). Las ventanas móviles
+tienen dos filas: ``current`` = [as_of - N, as_of) y ``previous`` = el
+mismo número de días justo antes.
+"""
+import pandas as pd
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from src.core.cache_store import read_cache, write_cache, cache_mtime
+from src.db.models import DailyMetric
+
+WINDOWS = (7, 28)
+VIDEO_METRICS = {"Vistas": "views", "Likes": "likes", "Comentarios": "comments"}
+DAILY_METRICS = ["views", "likes", "comments", "subscribers"]
+SOURCES = {"videos": "rollups_videos", "daily": "rollups_daily"}
+
+def compute_rollups(dates, values, as_of):
+    """
+    Agrega ``values`` (DataFrame de métricas) por las fechas ``dates``.
+
+    ``dates`` es una serie de fechas sin zona alineada con ``values``;
+    ``as_of`` es el día (exclusivo) en el que terminan las ventanas móviles.
+    """
+    metrics = list(values.columns)
+    data = values.assign(_date=pd.to_datetime(dates).dt.normalize(), count=1).dropna(subset=["_date"])
+    metrics_count = metrics + ["count"]
+    parts = []
+
+    month = data["_date"].dt.to_period("M")
+    monthly = data[metrics_count].groupby(month).sum()
+    parts.append(pd.DataFrame({
+        "granularity": "month",
+        "label": monthly.index.strftime("%Y-%m"),
+        "period": monthly.index.to_timestamp(),
+    }).join(monthly.reset_index(drop=True)))
+
+    week_start = data["_date"] - pd.to_timedelta(data["_date"].dt.weekday, unit="D")
+    weekly = data[metrics_count].groupby(week_start).sum()
+    iso = weekly.index.isocalendar()
+    parts.append(pd.DataFrame({
+        "granularity": "week",
+        "label": iso["year"].astype(str).to_numpy() + "-W" + iso["week"].astype(str).str.zfill(2).to_numpy(),
+        "period": weekly.index,
+    }).join(weekly.reset_index(drop=True)))
+
+    end = pd.Timestamp(as_of)
+    for days in WINDOWS:
+        span = pd.Timedelta(days=days)
+        for label, start in (("current", end - span), ("previous", end - 2 * span)):
+            in_window = (data["_date"] >= start) & (data["_date"] < start + span)
+            totals = data.loc[in_window, metrics_count].sum()
+            parts.append(pd.DataFrame([{
+                "granularity": f"{days}D", "label": label, "period": start, **totals.to_dict()
+            }]))
+
+    return pd.concat(parts, ignore_index=True)[["granularity", "label", "period"] + metrics_count]
+
+def video_rollups(df, as_of=None):
+    """Rollups del catálogo por fecha de publicación (vistas/likes/comentarios acumulados)."""
+    published = pd.to_datetime(df["Publicado"], utc=True, errors="coerce").dt.tz_convert(None)
+    values = pd.DataFrame({
+        metric: pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int64") if col in df.columns else 0
+        for col, metric in VIDEO_METRICS.items()
+    }, index=df.index)
+    return compute_rollups(published, values, as_of or date.today())
+
+def daily_rollups(df, as_of=None):
+    """Rollups de las métricas diarias de Analytics; las ventanas terminan tras el último día con datos."""
+    days = pd.to_datetime(df["day"])
+    if as_of is None:
+        as_of = (days.max() + timedelta(days=1)) if not df.empty else date.today()
+    return compute_rollups(days, df[DAILY_METRICS].astype("int64"), as_of)
+
+def _daily_frame(db: Session, channel_pk):
+    rows = db.query(DailyMetric.date, *(getattr(DailyMetric, col) for col in DAILY_METRICS)).filter(
+        DailyMetric.channel_id_fk == channel_pk
+    ).all()
+    return pd.DataFrame(rows, columns=["day"] + DAILY_METRICS)
+
+def update_video_rollups(df, channel_id):
+    """Recalcula y guarda los rollups del catálogo de un canal."""
+    if df is None or df.empty:
+        return None
+    rollups = video_rollups(df)
+    write_cache(rollups, SOURCES["videos"], channel_id)
+    return rollups
+
+def update_daily_rollups(db: Session, channel_pk, channel_id):
+    """Recalcula y guarda los rollups de las métricas diarias guardadas en la BD."""
+    df = _daily_frame(db, channel_pk)
+    if df.empty:
+        return None
+    rollups = daily_rollups(df)
+    write_cache(rollups, SOURCES["daily"], channel_id)
+    return rollups
+
+def load_rollups(channel_id):
+    """Lee los rollups guardados del canal: ``{"videos": df | None, "daily": df | None}``."""
+    return {source: read_cache(name, channel_id) for source, name in SOURCES.items()}
+
+def rollups_mtime(channel_id):
+    """Epoch de la última actualización de cualquiera de los rollups, o None."""
+    mtimes = [cache_mtime(name, channel_id) for name in SOURCES.values()]
+    mtimes = [mtime for mtime in mtimes if mtime is not None]
+    return max(mtimes) if mtimes else None
+
+def rollups_to_dict(df):
+    """Tabla larga -> ``{"monthly": [...], "weekly": [...], "windows": {"7D": {...}}, "as_of"}``."""
+    if df is None or df.empty:
+        return None
+    df = df.copy()
+    df["period"] = pd.to_datetime(df["period"]).dt.strftime("%Y-%m-%d")
+    records = lambda part: part.drop(columns=["granularity"]).to_dict(orient="records")
+    result = {
+        "monthly": records(df[df["granularity"] == "month"]),
+        "weekly": records(df[df["granularity"] == "week"]),
+        "windows": {},
+        "as_of": None,
+    }
+    for days in WINDOWS:
+        window = df[df["granularity"] == f"{days}D"].set_index("label")
+        if window.empty:
+            continue
+        result["windows"][f"{days}D"] = {
+            label: row.drop(["granularity", "period"]).to_dict() | {"start": row["period"]}
+            for label, row in window.iterrows()
+        }
+        if result["as_of"] is None and "current" in window.index:
+            start = pd.Timestamp(window.loc["current", "period"])
+            result["as_of"] = (start + timedelta(days=days)).strftime("%Y-%m-%d")
+    return result
@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..db.models import DailyMetric
+from ..core.config import SYNC_START_DATE, LATE_DATA_DAYS, ANALYTICS_CHUNK_DAYS
+from .failed_chunks import load_failed_chunks
+
+ANALYTICS_QUERY_COST = 1  # Quota units charged per youtubeAnalytics reports.query call
+
+def latest_metric_dates(db: Session, channel_pks=None):
+    """Returns {channel_pk: max(DailyMetric.date)} using one grouped query."""
+    query = db.query(DailyMetric.channel_id_fk, func.max(DailyMetric.date)).group_by(DailyMetric.channel_id_fk)
+    if channel_pks is not None:
+        query = query.filter(DailyMetric.channel_id_fk.in_(list(channel_pks)))
+    return {pk: last for pk, last in query.all()}
+
+def merge_ranges(ranges):
+    """Merges overlapping or adjacent (start, end) date ranges."""
+    merged = []
+    for start, end in sorted(r for r in ranges if r[0] <= r[1]):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def split_range(start, end, days=None):
+    """Splits [start, end] into consecutive windows of at most ``days`` days."""
+    days = days or ANALYTICS_CHUNK_DAYS
+    windows = []
+    while start <= end:
+        window_end = min(end, start + timedelta(days=days - 1))
+        windows.append((start, window_end))
+        start = window_end + timedelta(days=1)
+    return windows
+
+def clip_ranges(ranges, first_date):
+    """Splits ``ranges`` at ``first_date``: (days from ``first_date`` on, older days)."""
+    kept, older = [], []
+    for start, end in ranges:
+        if end < first_date:
+            older.append((start, end))
+        elif start < first_date:
+            older.append((start, first_date - timedelta(days=1)))
+            kept.append((first_date, end))
+        else:
+            kept.append((start, end))
+    return kept, older
+
+def plan_ranges(last_date, end_date=None, late_days=None, first_date=None, pending=()):
+    """
+    Date ranges that still have to be requested for one channel.
+
+    Covers the gap after ``last_date`` (the newest stored day) up to
+    ``end_date`` (yesterday by default) plus a re-check window of the last
+    ``late_days`` days, because Analytics keeps revising recent figures.
+    ``pending`` are windows that failed in a previous run (see failed_chunks)
+    and are requested again. Adjacent ranges are merged.
+    """
+    end_date = end_date or date.today() - timedelta(days=1)
+    late_days = LATE_DATA_DAYS if late_days is None else late_days
+    first_date = first_date or date.fromisoformat(SYNC_START_DATE)
+
+    if last_date is None:
+        return merge_ranges([(first_date, end_date)])
+
+    ranges = [(last_date + timedelta(days=1), end_date), *pending]
+    if late_days > 0:
+        ranges.append((max(first_date, end_date - timedelta(days=late_days - 1)), min(last_date, end_date)))
+    return merge_ranges(ranges)
+
+def plan_daily_sync(db: Session, channels, end_date=None, late_days=None):
+    """
+    Builds the sync plan for ``channels`` (tuples of internal id, channel_id, title).
+
+    Returns {"channels": [{"channel", "ranges"}], "queries", "quota_units"};
+    channels that are already up to date get an empty ``ranges`` list.
+    """
+    latest = latest_metric_dates(db, [ch[0] for ch in channels])
+    plan = {"channels": [], "queries": 0, "quota_units": 0}
+    for ch in channels:
+        ranges = plan_ranges(latest.get(ch[0]), end_date=end_date, late_days=late_days,
+                             pending=load_failed_chunks(ch[1]))
+        plan["channels"].append({"channel": tuple(ch), "ranges": ranges})
+        plan["queries"] += sum(len(split_range(start, end)) for start, end in ranges)  # One query per chunk
+    plan["quota_units"] = plan["queries"] * ANALYTICS_QUERY_COST
+    return plan
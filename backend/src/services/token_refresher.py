@@ -0,0 +1,152 @@
+"""Refresco proactivo de tokens OAuth antes de que caduquen.
+
+Cada TOKEN_REFRESH_INTERVAL segundos busca los canales cuyo token de acceso
+caduca dentro de TOKEN_REFRESH_WINDOW segundos (o cuya caducidad se
+desconoce) y los refresca en paralelo, en lotes acotados. Los tokens nuevos
+se guardan cifrados en la BD y quedan en la caché de credenciales, así que
+ninguna petición de usuario espera a un refresco.
+
+Los fallos se anotan en el canal: un error transitorio espera el doble en
+cada intento (hasta TOKEN_REFRESH_BACKOFF_MAX) y un ``invalid_grant`` (refresh
+token revocado o caducado) aparca el canal hasta que se vuelva a autorizar.
+
+Uso independiente (p. ej. desde cron): ``python -m src.services.token_refresher --once``
+"""
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from google.auth.exceptions import RefreshError
+from sqlalchemy import or_
+from src.core.config import (logger, TOKEN_REFRESH_WINDOW, TOKEN_REFRESH_INTERVAL, TOKEN_REFRESH_WORKERS,
+                             TOKEN_REFRESH_BACKOFF_MAX)
+from src.core.database import SessionLocal
+from src.db.models import Channel
+from src.services.credential_store import refresh_channel_credentials
+
+def channels_expiring(db, window=TOKEN_REFRESH_WINDOW, now=None):
+    """channel_id de los canales con refresh token cuyo acceso caduca dentro de ``window`` segundos."""
+    now = now or datetime.utcnow()
+    limit = now + timedelta(seconds=window)
+    rows = db.query(Channel.channel_id).filter(
+        Channel.refresh_token_enc.isnot(None),
+        or_(Channel.token_expiry.is_(None), Channel.token_expiry <= limit),
+        # Ni canales con el refresh token revocado ni los que esperan su próximo reintento
+        or_(Channel.refresh_token_revoked.is_(None), Channel.refresh_token_revoked.is_(False)),
+        or_(Channel.token_refresh_retry_at.is_(None), Channel.token_refresh_retry_at <= now),
+    ).order_by(Channel.token_expiry).all()
+    return [channel_id for (channel_id,) in rows]
+
+def is_revoked(error):
+    """¿El refresco falló porque Google ya no acepta el refresh token (``invalid_grant``)?"""
+    if not isinstance(error, RefreshError) or getattr(error, "retryable", False):
+        return False
+    return "invalid_grant" in str(error.args[0] if error.args else error)
+
+def retry_delay(failures, base=None, cap=None):
+    """Segundos hasta el siguiente intento tras ``failures`` fallos seguidos (backoff exponencial)."""
+    base = base or TOKEN_REFRESH_INTERVAL or 300
+    cap = TOKEN_REFRESH_BACKOFF_MAX if cap is None else cap
+    return min(cap, base * 2 ** max(0, failures - 1))
+
+def record_failure(db, channel_id, error, now=None):
+    """Anota el fallo del canal: lo aparca si está revocado o le pone fecha al reintento."""
+    channel = db.query(Channel).filter(Channel.channel_id == channel_id).first()
+    if channel is None:
+        return None
+    channel.token_refresh_failures = (channel.token_refresh_failures or 0) + 1
+    if is_revoked(error):
+        channel.refresh_token_revoked = True
+        channel.token_refresh_retry_at = None
+    else:
+        delay = retry_delay(channel.token_refresh_failures)
+        channel.token_refresh_retry_at = (now or datetime.utcnow()) + timedelta(seconds=delay)
+    db.commit()
+    return channel
+
+def _refresh_one(channel_id, window):
+    try:
+        return channel_id, refresh_channel_credentials(channel_id, window=window), None
+    except Exception as e:
+        failure = None
+        try:
+            with SessionLocal() as db:
+                channel = record_failure(db, channel_id, e)
+                if channel is not None:
+                    failure = (channel.token_refresh_failures, channel.token_refresh_retry_at, channel.refresh_token_revoked)
+        except Exception as db_error:
+            logger.error(f"Could not record token refresh failure for {channel_id}: {db_error}")
+        if failure is None:
+            logger.error(f"Token refresh failed for {channel_id}: {e}")
+        elif failure[2]:
+            logger.error(f"Token refresh failed for {channel_id}: refresh token revoked ({e}); "
+                         f"skipping it until the channel is re-authorized")
+        else:
+            logger.warning(f"Token refresh failed for {channel_id} ({failure[0]} in a row): {e}; "
+                           f"next attempt at {failure[1]:%Y-%m-%d %H:%M:%S} UTC")
+        return channel_id, False, str(e)
+
+def refresh_expiring_tokens(window=TOKEN_REFRESH_WINDOW, workers=TOKEN_REFRESH_WORKERS):
+    """Refresca en paralelo (``workers`` a la vez) los tokens que caducan pronto. Devuelve un resumen."""
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        channel_ids = channels_expiring(db, window)
+
+    run = {"channels": len(channel_ids), "refreshed": 0, "errors": 0, "duration": 0.0}
+    if channel_ids:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="token-refresh") as pool:
+            for _, refreshed, error in pool.map(lambda channel_id: _refresh_one(channel_id, window), channel_ids):
+                run["refreshed"] += int(refreshed)
+                run["errors"] += int(error is not None)
+    run["duration"] = round(time.perf_counter() - started, 3)
+    if channel_ids:
+        logger.info(f"Token refresh: {run['refreshed']}/{run['channels']} refreshed, "
+                    f"{run['errors']} errors in {run['duration']}s")
+    return run
+
+class TokenRefresher:
+    """Hilo en segundo plano que ejecuta ``refresh_expiring_tokens`` periódicamente."""
+
+    def __init__(self, interval=TOKEN_REFRESH_INTERVAL, window=TOKEN_REFRESH_WINDOW, workers=TOKEN_REFRESH_WORKERS):
+        self.interval = interval
+        self.window = window
+        self.workers = workers
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-refresher", daemon=True)
+        self._thread.start()
+        logger.info(f"Token refresher started (every {self.interval}s, window {self.window}s)")
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                refresh_expiring_tokens(self.window, self.workers)
+            except Exception as e:
+                logger.error(f"Token refresher run failed: {e}")
+            self._stop.wait(self.interval)
+
+token_refresher = TokenRefresher()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresca los tokens OAuth que caducan pronto.")
+    parser.add_argument("--window", type=int, default=TOKEN_REFRESH_WINDOW, help="segundos antes de caducar")
+    parser.add_argument("--workers", type=int, default=TOKEN_REFRESH_WORKERS, help="refrescos en paralelo")
+    parser.add_argument("--once", action="store_true", help="una sola pasada en lugar de un bucle")
+    args = parser.parse_args()
+
+    if args.once:
+        print(refresh_expiring_tokens(args.window, args.workers))
+    else:
+        refresher = TokenRefresher(interval=TOKEN_REFRESH_INTERVAL or 300, window=args.window, workers=args.workers)
+        refresher._run()
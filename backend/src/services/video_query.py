@@ -0,0 +1,114 @@
+"""Paginación, orden y proyección del catálogo de videos en el servidor.
+
+Junto a la caché de videos se guarda un índice persistente (``videos_index``)
+con las posiciones de las filas ordenadas por vistas, likes y fecha de
+publicación, en ambos sentidos y con los nulos siempre al final, de modo que
+una página o un "top 5" no necesita ordenar el catálogo en cada petición.
+"""
+import base64
+import json
+import numpy as np
+import pandas as pd
+from src.core.cache_store import read_cache, write_cache, apply_schema, cache_mtime
+from src.services.rollups import update_video_rollups
+
+SORT_COLUMNS = {"views": "Vistas", "likes": "Likes", "published": "Publicado"}
+ORDERS = {"desc": "", "asc": "_asc"}  # Sufijo de la columna del índice por sentido
+INDEX_COLUMNS = [key + suffix for key in SORT_COLUMNS for suffix in ORDERS.values()]
+
+class InvalidQueryError(ValueError):
+    """Parámetros de consulta no válidos (campo, orden o cursor)."""
+
+def build_sort_index(df):
+    """Posiciones de fila ordenadas (estable, nulos al final) por cada clave y sentido."""
+    return pd.DataFrame({
+        key + suffix: df[col].reset_index(drop=True)
+                             .sort_values(ascending=order == "asc", kind="stable", na_position="last")
+                             .index.to_numpy(dtype="int64")
+        for key, col in SORT_COLUMNS.items()
+        if col in df.columns
+        for order, suffix in ORDERS.items()
+    })
+
+def write_videos(df, channel_id):
+    """Guarda la caché de videos, su índice de orden y sus rollups."""
+    path = write_cache(df, "videos", channel_id)
+    typed = apply_schema(df, "videos")
+    write_cache(build_sort_index(typed), "videos_index", channel_id)
+    update_video_rollups(typed, channel_id)
+    return path
+
+def load_sort_index(df, channel_id):
+    """Lee el índice persistido; lo reconstruye si falta o es anterior al catálogo."""
+    index = read_cache("videos_index", channel_id)
+    stale = (cache_mtime("videos_index", channel_id) or 0) < (cache_mtime("videos", channel_id) or 0)
+    if index is None or stale or len(index) != len(df) or not set(INDEX_COLUMNS) <= set(index.columns):
+        index = build_sort_index(df)
+        write_cache(index, "videos_index", channel_id)
+    return index
+
+def _cutoff(published_after):
+    """``published_after`` como Timestamp UTC (o None)."""
+    if published_after is None:
+        return None
+    cutoff = pd.Timestamp(published_after)
+    return cutoff.tz_localize("UTC") if cutoff.tzinfo is None else cutoff.tz_convert("UTC")
+
+def _cursor_query(sort, order, published_after, limit):
+    """Parámetros que definen la lista paginada: un cursor sólo vale para los mismos."""
+    cutoff = _cutoff(published_after)
+    return {"s": sort, "o": order, "f": cutoff.isoformat() if cutoff is not None else None, "l": limit}
+
+def encode_cursor(sort, order, offset, published_after=None, limit=None):
+    data = {**_cursor_query(sort, order, published_after, limit), "p": offset}
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor, sort, order, published_after=None, limit=None):
+    """Devuelve el offset del cursor, validando que corresponde a la misma consulta."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset = int(data["p"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidQueryError("Invalid cursor")
+    expected = _cursor_query(sort, order, published_after, limit)
+    if any(data.get(key) != value for key, value in expected.items()) or offset < 0:
+        raise InvalidQueryError("Cursor does not match the requested sort/order/published_after/limit")
+    return offset
+
+def query_videos(df, index, sort=None, order="desc", published_after=None, limit=None, cursor=None, fields=None):
+    """
+    Aplica filtro, orden, paginación y proyección sobre el catálogo.
+
+    Devuelve (página, total de filas que cumplen el filtro, cursor siguiente o None).
+    Sin ``sort`` se conserva el orden de la playlist (el de siempre).
+    """
+    if sort is not None and sort not in SORT_COLUMNS:
+        raise InvalidQueryError(f"Invalid sort '{sort}'. Use one of: {', '.join(SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise InvalidQueryError("Invalid order. Use 'asc' or 'desc'")
+    if fields:
+        unknown = [field for field in fields if field not in df.columns]
+        if unknown:
+            raise InvalidQueryError(f"Unknown fields: {', '.join(unknown)}")
+
+    if sort is not None:
+        positions = index[sort + ORDERS[order]].to_numpy()
+    else:
+        positions = np.arange(len(df))
+
+    if published_after is not None and "Publicado" in df.columns:
+        cutoff = _cutoff(published_after)
+        published = pd.to_datetime(df["Publicado"], utc=True).dt.tz_convert(None).to_numpy()
+        positions = positions[published[positions] > cutoff.tz_convert(None).to_datetime64()]
+
+    total = len(positions)
+    offset = decode_cursor(cursor, sort, order, published_after, limit) if cursor else 0
+    end = total if limit is None else offset + limit
+    page_positions = positions[offset:end]
+    next_cursor = encode_cursor(sort, order, end, published_after, limit) if end < total else None
+
+    page = df.iloc[page_positions]
+    if fields:
+        page = page[fields]
+    return page, total, next_cursor
@@ -0,0 +1,193 @@
+"""Registro compartido de clientes de las APIs de Google (YouTube Data / Analytics).
+
+``build()`` se ejecuta una sola vez por clave (API key o canal) usando el documento
+de descubrimiento estático, y el servicio resultante se comparte entre hilos.
+Como ``httplib2.Http`` no es thread-safe, cada hilo ejecuta las peticiones con su
+propia conexión keep-alive a través de ``execute``.
+
+``execute`` es además el único punto de salida hacia Google: limita el ritmo
+por API key / canal OAuth (token bucket), acota las peticiones en vuelo de
+todo el proceso, reintenta los errores transitorios con backoff exponencial
+con jitter y convierte el resto en ``YouTubeAPIError``. Cada intento se anota
+en el libro de cuota (quota_ledger) y no se envía si ya no cabe en el
+presupuesto del día.
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs, urljoin
+import httplib2
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http, BatchHttpRequest
+from google_auth_httplib2 import AuthorizedHttp
+from src.core.config import (logger, YOUTUBE_API_ENDPOINT, YOUTUBE_ANALYTICS_API_ENDPOINT,
+                             API_RATE_LIMIT, API_RATE_BURST, API_MAX_CONCURRENCY, API_MAX_RETRIES, API_BACKOFF_BASE, API_BACKOFF_MAX)
+from src.core.rate_limit import RateLimiter
+from src.core.metrics import upstream_calls, upstream_duration
+from src.core.tracing import span
+from src.services import quota_ledger
+
+MAX_CLIENTS = 256  # Servicios construidos que se mantienen en memoria
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError", "internalError"}
+
+# URL base alternativa por API (vacía = la de Google)
+API_ENDPOINTS = {"youtube": YOUTUBE_API_ENDPOINT, "youtubeAnalytics": YOUTUBE_ANALYTICS_API_ENDPOINT}
+
+_lock = threading.Lock()
+_services = OrderedDict()  # (api, version, cache_key) -> (fingerprint, service)
+_local = threading.local()
+_limiter = RateLimiter(API_RATE_LIMIT, API_RATE_BURST)
+_in_flight = threading.BoundedSemaphore(max(1, API_MAX_CONCURRENCY))
+
+class YouTubeAPIError(Exception):
+    """Fallo de una llamada a Google tras agotar los reintentos (o no reintentable)."""
+
+    def __init__(self, message, status=None, reason=None, retryable=False):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.retryable = retryable
+
+    @property
+    def quota_exceeded(self):
+        return self.reason in ("quotaExceeded", "dailyLimitExceeded")
+
+def get_service(api_name, api_version, cache_key, fingerprint=None, **build_kwargs):
+    """Devuelve el servicio cacheado para ``cache_key`` o lo construye.
+
+    ``fingerprint`` permite reconstruir el servicio cuando cambia algo que va
+    dentro del cliente (p. ej. el token de acceso de unas credenciales).
+    """
+    key = (api_name, api_version, cache_key)
+    with _lock:
+        entry = _services.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            _services.move_to_end(key)
+            return entry[1]
+
+        if API_ENDPOINTS.get(api_name):
+            build_kwargs = {**build_kwargs, "client_options": {"api_endpoint": API_ENDPOINTS[api_name]}}
+        with span("client.build", api=api_name):
+            service = build(api_name, api_version, static_discovery=True, cache_discovery=False, **build_kwargs)
+        _services[key] = (fingerprint, service)
+        if len(_services) > MAX_CLIENTS:
+            _services.popitem(last=False)
+        return service
+
+def drop_service(api_name, api_version, cache_key):
+    """Elimina un servicio del registro (p. ej. tras revocar credenciales)."""
+    with _lock:
+        _services.pop((api_name, api_version, cache_key), None)
+
+def new_batch(service, api_name, callback):
+    """``BatchHttpRequest`` del servicio; con URL base alternativa, también el batch va allí."""
+    endpoint = API_ENDPOINTS.get(api_name)
+    if endpoint:
+        # api_endpoint sólo cambia la URL de las peticiones, no la del batch
+        return BatchHttpRequest(callback=callback, batch_uri=urljoin(endpoint, "batch"))
+    return service.new_batch_http_request(callback=callback)
+
+def _thread_http():
+    """Conexión httplib2 propia del hilo actual (reutiliza keep-alive)."""
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = _local.http = build_http()
+    return http
+
+def _authorized(source_http):
+    """Conexión del hilo, autorizada con las credenciales de ``source_http`` si las tiene."""
+    http = _thread_http()
+    if isinstance(source_http, AuthorizedHttp):
+        http = AuthorizedHttp(source_http.credentials, http=http)
+    return http
+
+def api_key_id(api_key):
+    """Clave de límite y de cuota de una API key (un hash: la key no se guarda en claro)."""
+    return "key:" + hashlib.sha256((api_key or "").encode()).hexdigest()[:12]
+
+def channel_key_id(channel_id):
+    """Clave de límite y de cuota de las llamadas OAuth de un canal."""
+    return f"oauth:{channel_id}"
+
+def _limit_key(request):
+    """Cubo de la petición: el canal OAuth (``ids=channel==...``) o un hash de la API key."""
+    params = parse_qs(urlparse(request.uri).query)
+    if isinstance(request.http, AuthorizedHttp):
+        ids = params.get("ids", [""])[0]
+        return channel_key_id(ids.removeprefix("channel==") or id(request.http.credentials))
+    return api_key_id(params.get("key", [""])[0])
+
+def _error_reason(error):
+    details = getattr(error, "error_details", None)
+    if isinstance(details, list) and details and isinstance(details[0], dict):
+        return details[0].get("reason")
+    return None
+
+def _classify(error):
+    """(status, reason, reintentable) de una excepción de la llamada."""
+    if isinstance(error, HttpError):
+        status, reason = error.resp.status, _error_reason(error)
+        return status, reason, status in RETRY_STATUSES or reason in RETRY_REASONS
+    if isinstance(error, (OSError, httplib2.HttpLib2Error)):  # Timeouts / conexión cortada
+        return None, type(error).__name__, True
+    return None, None, False
+
+def _backoff(attempt, error):
+    """Espera antes del reintento ``attempt``: Retry-After si lo hay, si no backoff exponencial con jitter."""
+    retry_after = error.resp.get("retry-after") if isinstance(error, HttpError) else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), API_BACKOFF_MAX)
+    return random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt))
+
+def _call(send, limit_key, tokens=1, units=1, retries=None, label="request"):
+    retries = API_MAX_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        if not quota_ledger.allows(limit_key, units):
+            upstream_calls.labels(label, "quota_budget").inc()
+            raise YouTubeAPIError(f"{label}: daily quota budget exhausted for {limit_key}", reason="quotaExceeded")
+        _limiter.acquire(limit_key, tokens)
+        quota_ledger.charge(limit_key, units)  # Google cobra también los intentos fallidos
+        started = None
+        try:
+            with _in_flight, span("upstream", method=label, attempt=attempt):
+                started = time.perf_counter()  # Sin contar la espera por el semáforo
+                response = send()
+            upstream_duration.labels(label, "200").observe(time.perf_counter() - started)
+            upstream_calls.labels(label, "200").inc()
+            return response
+        except Exception as e:
+            status, reason, retryable = _classify(e)
+            if started is not None:
+                upstream_duration.labels(label, status or reason or "error").observe(time.perf_counter() - started)
+            upstream_calls.labels(label, status or reason or "error").inc()
+            if not retryable or attempt == retries:
+                raise YouTubeAPIError(f"{label} failed ({status or reason}): {e}", status, reason, retryable) from e
+            delay = _backoff(attempt, e)
+            logger.warning(f"{label} failed ({status or reason}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+def execute(request, retries=None):
+    """Ejecuta una petición de googleapiclient con la conexión del hilo actual.
+
+    Respeta el límite de ritmo de su API key / canal y el tope global de
+    peticiones en vuelo; reintenta errores transitorios (``retries``, por
+    defecto API_MAX_RETRIES) y lanza ``YouTubeAPIError`` si no lo consigue.
+    """
+    return _call(lambda: request.execute(http=_authorized(request.http)),
+                 _limit_key(request), units=quota_ledger.cost_of(request.methodId), retries=retries,
+                 label=request.methodId)
+
+def execute_batch(batch, requests, retries=None):
+    """Ejecuta un ``BatchHttpRequest`` (una sola ida y vuelta) con la conexión del hilo actual.
+
+    ``requests`` son las peticiones añadidas al batch; de la primera se toman
+    las credenciales y la clave de límite. Cada petición interna consume un token.
+    """
+    return _call(lambda: batch.execute(http=_authorized(requests[0].http)),
+                 _limit_key(requests[0]), tokens=len(requests),
+                 units=sum(quota_ledger.cost_of(request.methodId) for request in requests),
+                 retries=retries, label="batch")
@@ -1,9 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from src.services.rollups import video_rollups
 
-def show(df):
-    """Muestra la vista principal del dashboard."""
+def show(df, rollups=None):
+    """Muestra la vista principal del dashboard.
+
+    ``rollups`` son los agregados precalculados del catálogo (ver
+    services/rollups); si no se pasan se calculan aquí.
+    """
     if df.empty:
         st.warning("No hay datos disponibles.")
         return
@@ -23,11 +28,10 @@ def show(df):
 
     with col_main:
         st.markdown("### 📈 Evolución Vistas")
-        df_hist = df.copy()
-        df_hist["Publicado"] = pd.to_datetime(df_hist["Publicado"]).dt.tz_localize(None)
-        df_hist["Mes"] = df_hist["Publicado"].dt.to_period("M").dt.to_timestamp()
-        
-        evol_mensual = df_hist.groupby("Mes")["Vistas"].sum().reset_index()
+        if rollups is None:
+            rollups = video_rollups(df)
+        mensual = rollups[rollups["granularity"] == "month"]
+        evol_mensual = pd.DataFrame({"Mes": pd.to_datetime(mensual["period"]), "Vistas": mensual["views"]})
         
         fig_line = px.area(evol_mensual, x="Mes", y="Vistas", 
                           color_discrete_sequence=["#00C851"]) # Gamer Green
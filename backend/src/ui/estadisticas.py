@@ -1,39 +1,32 @@
 import pandas as pd
 import plotly.express as px
 import streamlit as st
-from datetime import timedelta
+from src.services.rollups import video_rollups
 
-def show_time_comparisons(df):
-    """Muestra comparaciones en verde gamer."""
-    dfc = df.copy()
-    dfc["Publicado"] = pd.to_datetime(dfc["Publicado"], errors="coerce").dt.tz_localize(None)
-    hoy = pd.Timestamp.today().normalize()
+def show_time_comparisons(df, rollups=None):
+    """Muestra comparaciones en verde gamer (a partir de los rollups precalculados)."""
+    if rollups is None:
+        rollups = video_rollups(df)
 
     st.markdown("### 📊 Ventana Temporal")
     ventana = st.radio("", ["7D", "28D"], horizontal=True, label_visibility="collapsed")
 
-    dias = 7 if ventana == "7D" else 28
-    
-    ini_actual = hoy - timedelta(days=dias)
-    ini_previo = hoy - timedelta(days=dias * 2)
-
-    actual_df = dfc[(dfc["Publicado"] >= ini_actual) & (dfc["Publicado"] < hoy)]
-    previo_df = dfc[(dfc["Publicado"] >= ini_previo) & (dfc["Publicado"] < ini_actual)]
+    ventanas = rollups[rollups["granularity"] == ventana].set_index("label")
+    actual, previo = ventanas.loc["current"], ventanas.loc["previous"]
 
-    v_act = int(actual_df["Vistas"].sum())
-    v_pre = int(previo_df["Vistas"].sum())
+    v_act = int(actual["views"])
+    v_pre = int(previo["views"])
 
     c1, c2, c3 = st.columns(3)
     c1.metric("Vistas", f"{v_act:,}", delta=v_act - v_pre)
-    c2.metric("Likes", f"{int(actual_df['Likes'].sum()):,}")
-    c3.metric("Videos", len(actual_df))
+    c2.metric("Likes", f"{int(actual['likes']):,}")
+    c3.metric("Videos", int(actual["count"]))
 
     st.divider()
 
     # Gráfico de barras
-    dfc["MesPeriod"] = dfc["Publicado"].dt.to_period("M")
-    resumen_m = dfc.groupby("MesPeriod")["Vistas"].sum().reset_index()
-    resumen_m["Mes"] = resumen_m["MesPeriod"].dt.to_timestamp()
+    mensual = rollups[rollups["granularity"] == "month"]
+    resumen_m = pd.DataFrame({"Mes": pd.to_datetime(mensual["period"]), "Vistas": mensual["views"]})
     
     fig = px.bar(resumen_m.tail(6), x="Mes", y="Vistas", 
                  title="Vistas por Mes", 
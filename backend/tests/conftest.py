@@ -0,0 +1,37 @@
+import os
+
+# Antes de importar src: BD en memoria (una conexión por hilo; las pruebas corren en el principal)
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.core.database import Base, engine
+from src.services import quota_ledger
+
+@pytest.fixture
+def db_engine():
+    """Esquema vacío en la BD en memoria y libro de cuota sin totales cacheados."""
+    Base.metadata.create_all(bind=engine)
+    quota_ledger._used.clear()
+    quota_ledger._pending.clear()
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    quota_ledger._used.clear()
+    quota_ledger._pending.clear()
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Directorio de trabajo temporal: las cachés (``data/``) no tocan las del repo."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    return tmp_path / "data"
+
+@pytest.fixture
+def shared_session_factory(db_engine, data_dir):
+    """Sesiones sobre una única conexión en memoria, visible desde los hilos del pool."""
+    shared = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=shared)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=shared)
+    shared.dispose()
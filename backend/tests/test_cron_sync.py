@@ -0,0 +1,93 @@
+from datetime import date, timedelta
+import pandas as pd
+from src.core.metrics import registry
+from src.db.models import Channel, DailyMetric
+from src.services.cron_status import load_status
+from src.services.cron_sync import sync_daily_metrics_for_all_channels
+
+END = date.today() - timedelta(days=1)
+
+class FakeAnalytics:
+    """Sustituye a fetch_daily_stats: una fila por día y un canal que siempre falla."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, channel_id, start_date=None, end_date=None):
+        self.calls.append((channel_id, start_date, end_date))
+        if channel_id in self.failing:
+            raise RuntimeError("Analytics unavailable")
+        days = pd.date_range(start_date, end_date, freq="D")
+        return pd.DataFrame({"day": days.strftime("%Y-%m-%d"), "views": 10, "likes": 1, "comments": 0,
+                             "subscribers": 2})
+
+def add_channels(session_factory, *channel_ids, last_days=None):
+    """Canales con métricas guardadas hasta ``last_days`` días antes de ayer (para acotar el plan)."""
+    with session_factory() as db:
+        for channel_id in channel_ids:
+            channel = Channel(channel_id=channel_id, title=f"Canal {channel_id}")
+            db.add(channel)
+            db.flush()
+            db.add(DailyMetric(channel_id_fk=channel.id, date=END - timedelta(days=last_days), views=1))
+        db.commit()
+
+def stored_rows(session_factory, channel_id):
+    with session_factory() as db:
+        return db.query(DailyMetric).join(Channel).filter(Channel.channel_id == channel_id).count()
+
+def test_sync_writes_missing_days_and_isolates_failures(shared_session_factory):
+    add_channels(shared_session_factory, "UCa", "UCbroken", "UCc", last_days=5)
+    fetcher = FakeAnalytics(failing={"UCbroken"})
+
+    run = sync_daily_metrics_for_all_channels(workers=3, fetcher=fetcher, session_factory=shared_session_factory,
+                                              late_days=0)
+
+    summaries = {ch["channel_id"]: ch for ch in run["channels"]}
+    assert summaries["UCa"]["rows"] == summaries["UCc"]["rows"] == 5
+    assert summaries["UCa"]["error"] is None and summaries["UCc"]["error"] is None
+    assert summaries["UCbroken"]["rows"] == 0
+    assert "Analytics unavailable" in summaries["UCbroken"]["error"]
+    assert (run["rows"], run["errors"], run["deferred"]) == (10, 1, [])
+
+    # El canal que falla no deja filas a medias y los demás quedan al día
+    assert stored_rows(shared_session_factory, "UCa") == stored_rows(shared_session_factory, "UCc") == 6
+    assert stored_rows(shared_session_factory, "UCbroken") == 1
+    assert {call[0] for call in fetcher.calls} == {"UCa", "UCbroken", "UCc"}
+
+def test_up_to_date_channels_are_not_fetched(shared_session_factory):
+    add_channels(shared_session_factory, "UCfresh", last_days=0)
+    fetcher = FakeAnalytics()
+
+    run = sync_daily_metrics_for_all_channels(workers=1, fetcher=fetcher, session_factory=shared_session_factory,
+                                              late_days=0)
+
+    assert fetcher.calls == []
+    assert (run["channels"], run["rows"], run["errors"]) == ([], 0, 0)
+
+def test_run_summary_is_persisted_for_metrics(shared_session_factory):
+    add_channels(shared_session_factory, "UCa", "UCbroken", last_days=2)
+    fetcher = FakeAnalytics(failing={"UCbroken"})
+
+    sync_daily_metrics_for_all_channels(workers=2, fetcher=fetcher, session_factory=shared_session_factory, late_days=1)
+    sync_daily_metrics_for_all_channels(workers=2, fetcher=fetcher, session_factory=shared_session_factory, late_days=1)
+
+    # El proceso del cron termina: el resumen queda en disco con totales acumulados
+    status = load_status()
+    assert (status["runs"], status["rows"], status["errors"]) == (2, 1, 1)
+    assert status["totals"] == {"UCa": {"rows": 3, "errors": 0}, "UCbroken": {"rows": 0, "errors": 2}}
+    assert "Analytics unavailable" in status["channels"]["UCbroken"]["error"]
+
+    text = registry.render()
+    assert "cron_sync_runs_total 2" in text
+    assert 'cron_sync_rows_total{channel_id="UCa"} 3' in text
+    assert 'cron_sync_errors_total{channel_id="UCbroken"} 2' in text
+    assert f"cron_sync_last_run_timestamp_seconds {status['finished_at']!r}" in text
+
+def test_dry_run_is_not_persisted(shared_session_factory):
+    add_channels(shared_session_factory, "UCa", last_days=2)
+
+    sync_daily_metrics_for_all_channels(workers=1, fetcher=FakeAnalytics(), session_factory=shared_session_factory,
+                                        late_days=0, dry_run=True)
+
+    assert load_status() is None
@@ -0,0 +1,70 @@
+from datetime import date
+import pytest
+from src.services import fetch_daily
+from src.services.failed_chunks import load_failed_chunks
+from src.services.fetch_daily import fetch_daily_stats
+from src.services.youtube_clients import YouTubeAPIError
+
+TRANSIENT = YouTubeAPIError("analytics failed (503)", status=503, retryable=True)
+FORBIDDEN = YouTubeAPIError("analytics failed (403)", status=403, reason="forbidden")
+
+@pytest.fixture
+def analytics(monkeypatch, data_dir):
+    """Ventanas de 10 días; ``errors`` asigna un error al inicio de la ventana que debe fallar."""
+    errors = {}
+
+    def query_chunk(service, channel_id, start, end, metrics, retries):
+        if start in errors:
+            raise errors[start]
+        return {"columnHeaders": [{"name": "day"}, {"name": "views"}, {"name": "subscribersGained"}],
+                "rows": [[start.isoformat(), 10, 1], [end.isoformat(), 20, 2]]}
+
+    monkeypatch.setattr(fetch_daily, "get_youtube_analytics_service", lambda channel_id: object())
+    monkeypatch.setattr(fetch_daily, "_query_chunk", query_chunk)
+    return errors
+
+def fetch(**kwargs):
+    return fetch_daily_stats("UCx", "2024-01-01", "2024-01-30", chunk_days=10, concurrency=2, **kwargs)
+
+def test_transient_chunk_failure_keeps_partial_result(analytics):
+    analytics[date(2024, 1, 11)] = TRANSIENT
+
+    df = fetch()
+
+    assert list(df["day"].dt.strftime("%Y-%m-%d")) == ["2024-01-01", "2024-01-10", "2024-01-21", "2024-01-30"]
+    assert "subscribers" in df.columns
+    assert load_failed_chunks("UCx") == [(date(2024, 1, 11), date(2024, 1, 20))]
+
+def test_permanent_chunk_failure_raises(analytics):
+    analytics[date(2024, 1, 21)] = FORBIDDEN
+    analytics[date(2024, 1, 11)] = TRANSIENT
+
+    with pytest.raises(YouTubeAPIError) as exc:
+        fetch()
+
+    assert exc.value.status == 403
+    assert sorted(load_failed_chunks("UCx")) == [(date(2024, 1, 11), date(2024, 1, 20)),
+                                                 (date(2024, 1, 21), date(2024, 1, 30))]
+
+def test_every_chunk_failing_raises(analytics):
+    for start in (date(2024, 1, 1), date(2024, 1, 11), date(2024, 1, 21)):
+        analytics[start] = TRANSIENT
+
+    with pytest.raises(YouTubeAPIError) as exc:
+        fetch()
+
+    assert exc.value.retryable
+
+def test_unexpected_error_is_wrapped(analytics):
+    analytics[date(2024, 1, 1)] = KeyError("rows")
+
+    with pytest.raises(YouTubeAPIError, match="Analytics daily report failed for UCx"):
+        fetch()
+
+def test_missing_credentials_raise(monkeypatch, data_dir):
+    monkeypatch.setattr(fetch_daily, "get_youtube_analytics_service", lambda channel_id: None)
+
+    with pytest.raises(YouTubeAPIError) as exc:
+        fetch()
+
+    assert exc.value.reason == "authError"
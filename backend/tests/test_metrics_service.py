@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+import pandas as pd
+from sqlalchemy import inspect, text
+from src.core.config import SYNC_START_DATE
+from src.core.database import SessionLocal
+from src.db.init_db import upgrade_schema
+from src.db.models import Channel, DailyMetric
+from src.services.failed_chunks import load_failed_chunks
+from src.services.metrics_service import get_daily_metrics, top_up_daily_metrics, upsert_daily_metrics
+
+def daily(days, views, subscribers=0):
+    return pd.DataFrame({"day": days, "views": views, "likes": 1, "comments": 0, "subscribers": subscribers})
+
+def add_channel(db, channel_id="UC1"):
+    channel = Channel(channel_id=channel_id, title=channel_id)
+    db.add(channel)
+    db.commit()
+    return channel.id
+
+def test_upsert_inserts_then_updates_on_conflict(db_engine):
+    with SessionLocal() as db:
+        pk = add_channel(db)
+        assert upsert_daily_metrics(db, daily(["2024-01-01", "2024-01-02"], [10, 20]), channel_pk=pk) == 2
+        db.commit()
+        # Analytics revisa los días recientes: la misma fecha se actualiza, no se duplica
+        assert upsert_daily_metrics(db, daily(["2024-01-02", "2024-01-03"], [25, 30], subscribers=4),
+                                    channel_pk=pk) == 2
+        db.commit()
+
+        assert db.query(DailyMetric).count() == 3
+        rows = get_daily_metrics(db, pk)
+    assert [(row["day"], row["views"], row["subscribers"]) for row in rows] == [
+        ("2024-01-01", 10, 0), ("2024-01-02", 25, 4), ("2024-01-03", 30, 4),
+    ]
+
+def test_upsert_keeps_last_duplicate_in_batch_and_ignores_empty(db_engine):
+    with SessionLocal() as db:
+        pk = add_channel(db)
+        assert upsert_daily_metrics(db, pd.DataFrame(), channel_pk=pk) == 0
+        upsert_daily_metrics(db, daily(["2024-01-01", "2024-01-01"], [1, 2]), channel_pk=pk)
+        db.commit()
+        assert db.query(DailyMetric.views).one() == (2,)
+
+def test_upgrade_schema_dedupes_before_creating_unique_index(db_engine):
+    with db_engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_daily_metrics_channel_date"))
+        conn.execute(text("INSERT INTO channels (id, channel_id, title) VALUES (1, 'UC1', 'UC1')"))
+        conn.execute(text("INSERT INTO daily_metrics (channel_id_fk, date, views) VALUES "
+                          "(1, '2024-01-01', 1), (1, '2024-01-01', 2), (1, '2024-01-02', 3)"))
+
+    upgrade_schema(db_engine)
+
+    indexes = {index["name"]: index for index in inspect(db_engine).get_indexes("daily_metrics")}
+    assert indexes["uq_daily_metrics_channel_date"]["unique"]
+    with SessionLocal() as db:
+        assert sorted(db.query(DailyMetric.date, DailyMetric.views).all()) == [(date(2024, 1, 1), 2), (date(2024, 1, 2), 3)]
+
+class FakeAnalytics:
+    """Sustituye a fetch_daily_stats: una fila por día pedido."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, channel_id, start_date=None, end_date=None):
+        self.calls.append((date.fromisoformat(start_date), date.fromisoformat(end_date)))
+        days = pd.date_range(start_date, end_date, freq="D")
+        return daily(days.strftime("%Y-%m-%d"), 10)
+
+def test_top_up_throttles_only_the_same_plan(db_engine, data_dir):
+    end = date.today() - timedelta(days=1)
+    fetcher = FakeAnalytics()
+    with SessionLocal() as db:
+        pk = add_channel(db)
+        upsert_daily_metrics(db, daily([(end - timedelta(days=3)).isoformat()], [5]), channel_pk=pk)
+        db.commit()
+        channel = db.get(Channel, pk)
+
+        # Rango ya guardado: nada que pedir y el throttle no se consume
+        assert top_up_daily_metrics(db, channel, end_date=end - timedelta(days=3), fetcher=fetcher) == 0
+        assert top_up_daily_metrics(db, channel, end_date=end - timedelta(days=1), fetcher=fetcher) == 2
+        # Otro rango (hasta ayer) pasa; repetir el mismo plan dentro del intervalo no
+        assert top_up_daily_metrics(db, channel, end_date=end, late_days=2, fetcher=fetcher) == 2
+        assert top_up_daily_metrics(db, channel, end_date=end, late_days=2, fetcher=fetcher) == 0
+        assert top_up_daily_metrics(db, channel, end_date=end, late_days=2, force=True, fetcher=fetcher) == 2
+
+    assert fetcher.calls == [(end - timedelta(days=2), end - timedelta(days=1)),
+                             (end - timedelta(days=1), end), (end - timedelta(days=1), end)]
+
+def test_top_up_caps_first_load_and_leaves_history_pending(db_engine, data_dir):
+    end = date.today() - timedelta(days=1)
+    fetcher = FakeAnalytics()
+    with SessionLocal() as db:
+        pk = add_channel(db, "UCnew")
+        channel = db.get(Channel, pk)
+
+        assert top_up_daily_metrics(db, channel, max_days=7, fetcher=fetcher) == 7
+
+    assert fetcher.calls == [(end - timedelta(days=6), end)]
+    assert load_failed_chunks("UCnew") == [(date.fromisoformat(SYNC_START_DATE), end - timedelta(days=7))]
@@ -0,0 +1,168 @@
+import pandas as pd
+import pytest
+from src.core.database import SessionLocal, dialect_insert
+from src.db.models import Channel, QuotaUsage
+from src.services import quota_ledger, refresh_jobs, youtube_clients
+from src.services.cron_sync import sync_daily_metrics_for_all_channels
+from src.services.quota_ledger import QuotaBudgetError
+from src.services.youtube_clients import YouTubeAPIError, api_key_id, channel_key_id
+
+BUDGET = 100
+RESERVE = 10
+
+@pytest.fixture
+def budget(db_engine, monkeypatch):
+    monkeypatch.setattr(quota_ledger, "QUOTA_DAILY_BUDGET", BUDGET)
+    monkeypatch.setattr(quota_ledger, "QUOTA_RESERVE", RESERVE)
+    return db_engine
+
+def spend_until(key, left):
+    """Deja a ``key`` con ``left`` unidades para hoy."""
+    quota_ledger.charge(key, BUDGET - left)
+
+class Job:
+    def __init__(self, full=False):
+        self.full = full
+        self.channel_id = "UCtest"
+
+def catalog(videos):
+    return pd.DataFrame({"Video ID": [f"v{i}" for i in range(videos)]})
+
+def stored(key):
+    with SessionLocal() as db:
+        return db.query(QuotaUsage).filter(QuotaUsage.key == key).one_or_none()
+
+def test_charge_accumulates_per_key_and_day(db_engine):
+    assert quota_ledger.charge("key:a", 1) == 1
+    assert quota_ledger.charge("key:a", 100) == 101
+    assert quota_ledger.charge("key:b", 5) == 5
+    quota_ledger.flush()
+
+    quota_ledger._used.clear()
+    assert quota_ledger.used("key:a") == 101
+    row = stored("key:a")
+    assert (row.units, row.calls, row.day) == (101, 2, quota_ledger.quota_day())
+
+def test_charges_are_buffered_until_flush(db_engine, monkeypatch):
+    quota_ledger.charge("key:a", 1)
+    quota_ledger.charge("key:a", 100)
+    assert stored("key:a") is None
+    # Lo pendiente cuenta en las lecturas aunque aún no esté en la BD
+    assert quota_ledger.used("key:a", refresh=True) == 101
+    assert quota_ledger.usage(["key:a"])["keys"][0]["calls"] == 2
+
+    statements = []
+    monkeypatch.setattr(quota_ledger, "dialect_insert", lambda bind: statements.append(1) or dialect_insert(bind))
+    quota_ledger.flush()
+    quota_ledger.flush()  # Sin pendientes no escribe nada
+
+    assert statements == [1]
+    assert (stored("key:a").units, stored("key:a").calls) == (101, 2)
+    assert quota_ledger.used("key:a", refresh=True) == 101
+
+def test_flush_adds_charges_from_other_processes(db_engine):
+    quota_ledger.charge("key:a", 3)
+    quota_ledger.flush()
+    with SessionLocal() as db:  # Otro proceso (cron) carga la misma clave
+        stored_row = db.query(QuotaUsage).filter(QuotaUsage.key == "key:a").one()
+        stored_row.units += 40
+        db.commit()
+
+    quota_ledger.charge("key:a", 2)
+    quota_ledger.flush()
+
+    assert quota_ledger.used("key:a") == 45
+
+def test_failed_flush_keeps_charges_pending(db_engine, monkeypatch):
+    quota_ledger.charge("key:a", 7)
+    def broken(bind):
+        raise OSError("database is locked")
+    monkeypatch.setattr(quota_ledger, "dialect_insert", broken)
+    quota_ledger.flush()
+    assert quota_ledger.used("key:a") == 7 and stored("key:a") is None
+
+    monkeypatch.setattr(quota_ledger, "dialect_insert", dialect_insert)
+    quota_ledger.flush()
+    assert stored("key:a").units == 7
+
+def test_remaining_is_unlimited_without_budget(db_engine, monkeypatch):
+    monkeypatch.setattr(quota_ledger, "QUOTA_DAILY_BUDGET", 0)
+    quota_ledger.charge("key:a", 50)
+    assert quota_ledger.remaining("key:a") is None
+    assert quota_ledger.allows("key:a", 10_000)
+
+def test_call_raises_quota_exceeded_once_budget_is_spent(budget):
+    calls = []
+    send = lambda: calls.append(1) or {"items": []}
+    spend_until("key:a", 2)
+
+    youtube_clients._call(send, "key:a", units=1, retries=0)
+    youtube_clients._call(send, "key:a", units=1, retries=0)
+    with pytest.raises(YouTubeAPIError) as error:
+        youtube_clients._call(send, "key:a", units=1, retries=0)
+
+    assert error.value.quota_exceeded
+    assert len(calls) == 2  # La tercera no llega a Google
+    assert quota_ledger.used("key:a", refresh=True) == BUDGET
+
+def test_call_checks_the_cost_of_the_whole_request(budget):
+    spend_until("key:a", 4)
+    with pytest.raises(YouTubeAPIError):
+        youtube_clients._call(lambda: {}, "key:a", units=5, retries=0)
+    assert quota_ledger.remaining("key:a") == 4
+
+def test_call_records_duration_by_method_and_status(budget):
+    duration = youtube_clients.upstream_duration
+    youtube_clients._call(lambda: {}, "key:a", retries=0, label="test.ok")
+    with pytest.raises(YouTubeAPIError):
+        youtube_clients._call(lambda: 1 / 0, "key:a", retries=0, label="test.fail")
+
+    assert sum(duration.labels("test.ok", "200").counts) == 1
+    assert sum(duration.labels("test.fail", "error").counts) == 1
+    assert ("test.fail", "200") not in duration._children
+
+# 100 videos = 2 lotes: incremental cuesta 1 + 2 + 2 = 5, statistics 2 y full 1 + 2 * 2 = 5
+@pytest.mark.parametrize("left, expected", [
+    (BUDGET, "incremental"),
+    (RESERVE + 5, "incremental"),  # Justo en la reserva tras gastar
+    (RESERVE + 4, "statistics"),
+    (2, "statistics"),             # Sólo estadísticas puede gastar la reserva
+])
+def test_video_mode_with_cached_catalog(budget, left, expected):
+    spend_until(api_key_id("k"), left)
+    assert refresh_jobs._video_mode(Job(), catalog(100), "k") == expected
+
+def test_video_mode_defers_when_statistics_do_not_fit(budget):
+    spend_until(api_key_id("k"), 1)
+    with pytest.raises(QuotaBudgetError):
+        refresh_jobs._video_mode(Job(), catalog(100), "k")
+
+# Sin catálogo: full cuesta 1 + 2 * 1 = 3 y no hay modo de sólo estadísticas
+def test_video_mode_without_catalog(budget):
+    spend_until(api_key_id("k"), RESERVE + 3)
+    assert refresh_jobs._video_mode(Job(), None, "k") == "full"
+
+    quota_ledger.charge(api_key_id("k"), 1)
+    with pytest.raises(QuotaBudgetError):
+        refresh_jobs._video_mode(Job(), None, "k")
+
+def test_video_mode_full_request_falls_back_to_statistics(budget):
+    spend_until(api_key_id("k"), RESERVE + 4)
+    assert refresh_jobs._video_mode(Job(full=True), catalog(100), "k") == "statistics"
+
+def test_video_mode_ignores_reserve_without_budget(db_engine, monkeypatch):
+    monkeypatch.setattr(quota_ledger, "QUOTA_DAILY_BUDGET", 0)
+    quota_ledger.charge(api_key_id("k"), 1_000_000)
+    assert refresh_jobs._video_mode(Job(), catalog(100), "k") == "incremental"
+
+def test_cron_defers_channel_without_quota_for_its_queries(budget):
+    with SessionLocal() as db:
+        db.add_all([Channel(channel_id="UCok", title="OK"), Channel(channel_id="UClow", title="Low")])
+        db.commit()
+    # Sin métricas guardadas se pide todo el historial: varias ventanas por canal
+    spend_until(channel_key_id("UClow"), 1)
+
+    run = sync_daily_metrics_for_all_channels(workers=1, late_days=0, dry_run=True)
+
+    assert run["deferred"] == ["UClow"]
+    assert run["quota_units"] > 1
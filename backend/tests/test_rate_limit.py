@@ -0,0 +1,29 @@
+import time
+from src.core.rate_limit import RateLimiter, TokenBucket
+
+def test_burst_is_served_without_waiting():
+    bucket = TokenBucket(rate=1, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+def test_waits_for_refill_once_burst_is_spent():
+    bucket = TokenBucket(rate=50, burst=1)
+    bucket.acquire()
+    started = time.monotonic()
+    waited = bucket.acquire()
+    assert waited > 0
+    assert time.monotonic() - started >= 0.015  # ~1/50 s
+
+def test_request_larger_than_burst_is_capped():
+    bucket = TokenBucket(rate=1000, burst=2)
+    assert bucket.acquire(tokens=10) == 0.0  # Cuenta como el cubo entero, no espera para siempre
+
+def test_zero_rate_disables_limit():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
+
+def test_buckets_are_per_key():
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.acquire("key:a") == 0.0
+    assert limiter.acquire("key:b") == 0.0
+    assert limiter.bucket("key:a") is limiter.bucket("key:a")
+    assert limiter.bucket("key:a") is not limiter.bucket("key:b")
@@ -0,0 +1,56 @@
+import threading
+import time
+import pytest
+from src.core.singleflight import SingleFlight
+
+def run_concurrently(flight, key, fn, callers):
+    """Lanza ``callers`` llamadas a ``flight.do`` y devuelve sus resultados (o excepciones)."""
+    results = [None] * callers
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "catalog"
+
+    threads, results = run_concurrently(flight, "videos:UC1", load, 5)
+    while not flight.in_flight("videos:UC1"):
+        time.sleep(0.001)
+    time.sleep(0.1)  # Que el resto de hilos llegue a esperar al primero
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["catalog"] * 5
+    assert not flight.in_flight("videos:UC1")
+
+def test_error_is_shared_and_key_is_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        flight.do("k", fail)
+    assert not flight.in_flight("k")
+    assert flight.do("k", lambda: 42) == 42  # El siguiente intento vuelve a ejecutar
+
+def test_different_keys_do_not_block_each_other():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: flight.do("b", lambda: "b") + "a") == "ba"
@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+import pytest
+from src.services.sync_planner import split_range
+
+@pytest.mark.parametrize("days", [1, 7, 90, 365])
+def test_windows_are_contiguous_and_bounded(days):
+    start, end = date(2022, 12, 31), date(2024, 3, 1)
+    windows = split_range(start, end, days)
+
+    assert windows[0][0] == start and windows[-1][1] == end
+    assert all(s <= e and (e - s).days < days for s, e in windows)
+    assert all(prev[1] + timedelta(days=1) == nxt[0] for prev, nxt in zip(windows, windows[1:]))
+    assert len(windows) == -(-((end - start).days + 1) // days)  # ceil(días / ventana)
+
+def test_exact_multiple_has_no_empty_tail():
+    assert split_range(date(2024, 1, 1), date(2024, 1, 6), 3) == [
+        (date(2024, 1, 1), date(2024, 1, 3)),
+        (date(2024, 1, 4), date(2024, 1, 6)),
+    ]
+
+def test_single_day_and_empty_range():
+    day = date(2024, 2, 29)
+    assert split_range(day, day, 90) == [(day, day)]
+    assert split_range(day, day - timedelta(days=1), 90) == []
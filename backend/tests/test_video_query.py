@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+from src.services.video_query import (InvalidQueryError, build_sort_index, decode_cursor, encode_cursor,
+                                      query_videos)
+
+@pytest.fixture
+def videos():
+    return pd.DataFrame({
+        "Video ID": [f"v{i}" for i in range(7)],
+        "Publicado": pd.date_range("2024-01-01", periods=7, freq="D", tz="UTC"),
+        "Vistas": [30, 10, 70, 10, 50, 0, 60],
+        "Likes": [3, 1, 7, 1, 5, 0, 6],
+    })
+
+def paginate(df, limit, **query):
+    index = build_sort_index(df)
+    ids, cursor = [], None
+    while True:
+        page, total, cursor = query_videos(df, index, limit=limit, cursor=cursor, **query)
+        ids.extend(page["Video ID"])
+        if cursor is None:
+            return ids, total
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("views", "desc", 40), "views", "desc") == 40
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor("views", "desc", 0)[:-3], "e30"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidQueryError):
+        decode_cursor(cursor, "views", "desc")
+
+@pytest.mark.parametrize("sort, order", [("likes", "desc"), ("views", "asc"), (None, "desc")])
+def test_cursor_must_match_sort_and_order(sort, order):
+    with pytest.raises(InvalidQueryError):
+        decode_cursor(encode_cursor("views", "desc", 10), sort, order)
+
+@pytest.mark.parametrize("reused_with", [{"published_after": "2024-01-04"}, {"limit": 5}])
+def test_cursor_is_bound_to_filter_and_limit(videos, reused_with):
+    index = build_sort_index(videos)
+    _, _, cursor = query_videos(videos, index, sort="views", limit=2)
+    query = {"sort": "views", "limit": 2, **reused_with}
+    with pytest.raises(InvalidQueryError):
+        query_videos(videos, index, cursor=cursor, **query)
+
+def test_cursor_accepts_equivalent_timestamps():
+    cursor = encode_cursor("views", "desc", 2, published_after="2024-01-04T00:00:00Z", limit=2)
+    assert decode_cursor(cursor, "views", "desc", pd.Timestamp("2024-01-04"), 2) == 2
+
+def test_negative_offset_is_rejected():
+    with pytest.raises(InvalidQueryError):
+        decode_cursor(encode_cursor("views", "desc", -1), "views", "desc")
+
+def test_pages_cover_every_row_once_in_order(videos):
+    ids, total = paginate(videos, limit=3, sort="views")
+    assert total == 7
+    # Empates (10 y 10) en el orden del catálogo: el orden es estable entre páginas
+    assert ids == ["v2", "v6", "v4", "v0", "v1", "v3", "v5"]
+
+def test_ascending_pages_are_stable(videos):
+    ids, _ = paginate(videos, limit=2, sort="views", order="asc")
+    assert ids == ["v5", "v1", "v3", "v0", "v4", "v6", "v2"]
+
+@pytest.mark.parametrize("order, expected", [
+    ("desc", ["v2", "v0", "v3", "v1"]),
+    ("asc", ["v3", "v0", "v2", "v1"]),
+])
+def test_missing_values_sort_last_in_both_orders(order, expected):
+    df = pd.DataFrame({
+        "Video ID": ["v0", "v1", "v2", "v3"],
+        "Vistas": [20.0, None, 30.0, 5.0],
+        "Likes": [1, 1, 1, 1],
+        "Publicado": pd.to_datetime(["2024-01-02", None, "2024-01-03", "2024-01-01"], utc=True),
+    })
+    assert paginate(df, limit=3, sort="views", order=order)[0] == expected
+    nulls_last = paginate(df, limit=3, sort="published", order=order)[0]
+    assert nulls_last[-1] == "v1"
+
+def test_without_sort_keeps_playlist_order(videos):
+    ids, _ = paginate(videos, limit=4)
+    assert ids == list(videos["Video ID"])
+
+def test_filter_applies_before_paging(videos):
+    ids, total = paginate(videos, limit=2, sort="views", published_after="2024-01-04")
+    assert total == 3
+    assert ids == ["v6", "v4", "v5"]
+
+def test_last_page_has_no_cursor_and_projection(videos):
+    page, total, cursor = query_videos(videos, build_sort_index(videos), sort="likes", limit=7, fields=["Video ID"])
+    assert cursor is None
+    assert list(page.columns) == ["Video ID"]
+    assert len(page) == total == 7
+
+@pytest.mark.parametrize("query", [{"sort": "title"}, {"order": "up"}, {"fields": ["Nope"]}])
+def test_invalid_query(videos, query):
+    with pytest.raises(InvalidQueryError):
+        query_videos(videos, build_sort_index(videos), **query)
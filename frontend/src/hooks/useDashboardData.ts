@@ -2,6 +2,15 @@ import { useState, useEffect, useMemo } from 'react';
 import axios from 'axios';
 import type { Video, DailyStat, Timeframe, DateRange } from '../types';
 
+// Pre-aggregated month row from /api/rollups (computed at sync time)
+interface MonthlyRollup {
+    label: string;
+    views: number;
+    likes: number;
+    comments: number;
+    subscribers: number;
+}
+
 interface ChannelStats {
     subscribers: number;
     views: number;
@@ -13,6 +22,7 @@ interface ChannelStats {
 export function useDashboardData(timeframe: Timeframe, activeMetric: 'views' | 'likes' | 'comments' | 'subscribers', customRange?: DateRange) {
     const [videos, setVideos] = useState<Video[]>([]);
     const [analytics, setAnalytics] = useState<DailyStat[]>([]);
+    const [monthlyRollup, setMonthlyRollup] = useState<MonthlyRollup[] | null>(null);
     const [channelStats, setChannelStats] = useState<ChannelStats | null>(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
@@ -51,10 +61,16 @@ export function useDashboardData(timeframe: Timeframe, activeMetric: 'views' | '
                 const results = await Promise.allSettled([
                     axios.get(`${apiBase}/videos`, { headers, timeout: 15000 }),
                     axios.get(`${apiBase}/analytics`, { headers, timeout: 15000 }),
-                    axios.get(`${apiBase}/channel`, { headers, timeout: 15000 })
+                    axios.get(`${apiBase}/channel`, { headers, timeout: 15000 }),
+                    axios.get(`${apiBase}/rollups`, { headers, timeout: 15000 })
                 ]);
 
-                const [videosRes, analyticsRes, channelRes] = results;
+                const [videosRes, analyticsRes, channelRes, rollupsRes] = results;
+
+                // Handle Rollups (optional: falls back to aggregating analytics below)
+                if (rollupsRes.status === 'fulfilled' && Array.isArray(rollupsRes.value.data?.daily?.monthly)) {
+                    setMonthlyRollup(rollupsRes.value.data.daily.monthly);
+                }
 
                 // Handle Videos
                 if (videosRes.status === 'fulfilled' && Array.isArray(videosRes.value.data)) {
@@ -177,6 +193,11 @@ export function useDashboardData(timeframe: Timeframe, activeMetric: 'views' | '
 
     // Aggregation for Month Table
     const monthlyStats = useMemo(() => {
+        if (monthlyRollup) {
+            return monthlyRollup
+                .map(m => ({ month: m.label, views: m.views, likes: m.likes, comments: m.comments, subscribers: m.subscribers }))
+                .sort((a, b) => b.views - a.views);
+        }
         const months: Record<string, { month: string, views: number, likes: number, comments: number, subscribers: number }> = {};
         analytics.forEach(d => {
             const monthKey = d.day.substring(0, 7); // YYYY-MM
@@ -189,7 +210,7 @@ export function useDashboardData(timeframe: Timeframe, activeMetric: 'views' | '
             months[monthKey].subscribers += (d.subscribers || 0);
         });
         return Object.values(months).sort((a, b) => b.views - a.views); // Sort by highest views
-    }, [analytics]);
+    }, [analytics, monthlyRollup]);
 
     const chartData = useMemo(() => {
         return filteredData.current.map(d => ({
@@ -75,7 +75,13 @@ export function DashboardView() {
                                         if (targetId) headers['x-youtube-channel-id'] = targetId;
                                         if (apiKey) headers['x-youtube-api-key'] = apiKey;
 
-                                        await axios.post(`${apiBase}/refresh`, {}, { headers });
+                                        // The refresh runs in the background: poll the job until it finishes
+                                        let { data: job } = await axios.post(`${apiBase}/refresh`, {}, { headers });
+                                        while (job?.job_id && (job.status === 'queued' || job.status === 'running')) {
+                                            await new Promise(resolve => setTimeout(resolve, 2000));
+                                            job = (await axios.get(`${apiBase}/refresh/${job.job_id}`)).data;
+                                        }
+                                        if (job?.status === 'failed') throw new Error(job.error);
                                         window.location.reload();
                                     } catch (e) {
                                         alert("Error al refrescar datos.");